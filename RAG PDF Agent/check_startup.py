@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import time
+
+# Plain CLI startup (`main.py --help`) must stay under this many seconds.
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "0.5"))
+RUNS = 5
+HEAVY_MODULES = ["langchain", "langchain_community", "langchain_huggingface", "chromadb", "sentence_transformers", "torch"]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROBE = (
+    "import runpy, sys\n"
+    "sys.argv = ['main.py', '--help']\n"
+    "try:\n"
+    "    runpy.run_path('main.py', run_name='__main__')\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+    "sys.stderr.write(','.join(loaded))\n"
+)
+
+def time_startup():
+    """Run `main.py --help` in a fresh interpreter, return (seconds, heavy modules loaded)"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", PROBE], cwd=HERE, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    loaded = [m for m in proc.stderr.strip().split(",") if m]
+    return elapsed, loaded
+
+def main():
+    timings = []
+    for _ in range(RUNS):
+        elapsed, loaded = time_startup()
+        if loaded:
+            print(f"FAIL: --help imported heavy modules: {', '.join(loaded)}")
+            return 1
+        timings.append(elapsed)
+
+    best = min(timings)
+    print(f"CLI startup: best {best:.3f}s over {RUNS} runs (budget {STARTUP_BUDGET:.3f}s)")
+    if best > STARTUP_BUDGET:
+        print("FAIL: startup is over budget")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,17 @@
 import os
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 
 load_dotenv()
 DATA_DIR = os.getenv("DATA_DIR", "data")
 CHROMA_DIR = os.getenv("CHROMA_DIR", "chroma_store")
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 def ingest_documents():
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import Chroma
+    from langchain_huggingface import HuggingFaceEmbeddings
+
     docs = []
     for file in os.listdir(DATA_DIR):
         if file.lower().endswith(".pdf"):
@@ -19,11 +21,11 @@ def ingest_documents():
     splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
     chunks = splitter.split_documents(docs)
 
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
     vectordb = Chroma.from_documents(
         documents=chunks,
         embedding=embeddings,
         persist_directory=CHROMA_DIR
     )
     vectordb.persist()
-    print(f"Ingested {len(chunks)} chunks into ChromaDB at '{CHROMA_DIR}'")
\ No newline at end of file
+    print(f"Ingested {len(chunks)} chunks into ChromaDB at '{CHROMA_DIR}'")
@@ -1,16 +1,24 @@
 import argparse
-from ingest import ingest_documents
-from response import query_documents
 
-if __name__ == "__main__":
+
+def build_parser():
     parser = argparse.ArgumentParser(description="Resume/Transcript RAG CLI Tool")
     parser.add_argument("--ingest", action="store_true", help="Ingest documents into ChromaDB")
     parser.add_argument("--query", type=str, help="Ask a question about the documents")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = build_parser()
     args = parser.parse_args()
 
+    # ingest/response pull in langchain, chroma and torch, so only import the
+    # one the chosen subcommand needs; --help and bad arguments stay instant.
     if args.ingest:
+        from ingest import ingest_documents
         ingest_documents()
     elif args.query:
+        from response import query_documents
         query_documents(args.query)
     else:
-        parser.print_help()
\ No newline at end of file
+        parser.print_help()
@@ -1,16 +1,18 @@
 import os
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains import RetrievalQA
-from langchain_community.llms import Ollama
 
 load_dotenv()
 CHROMA_DIR = os.getenv("CHROMA_DIR", "chroma_store")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 def query_documents(question):
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    from langchain_community.vectorstores import Chroma
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from langchain.chains import RetrievalQA
+    from langchain_community.llms import Ollama
+
+    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
     vectordb = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
     retriever = vectordb.as_retriever(search_kwargs={"k": 4})
 
@@ -26,4 +28,4 @@ def query_documents(question):
     print(f"\nAnswer:\n{result['result']}\n")
     print("Sources:")
     for doc in result["source_documents"]:
-        print(f"- {doc.metadata.get('source')}")
\ No newline at end of file
+        print(f"- {doc.metadata.get('source')}")
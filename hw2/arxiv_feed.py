@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import instrument
+from fetcher import Fetcher
+
+# Configuration
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+PAGE_SIZE = 100  # Entries per API request
+API_DELAY = 3.0  # arXiv asks for one API call every 3 seconds
+CHUNK_SIZE = 1 << 14  # Bytes handed to the feed parser at a time
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+
+
+def arxiv_id(url: str) -> str:
+    """'http://arxiv.org/abs/2507.23776v1' -> '2507.23776' (version stripped)"""
+    tail = url.split('/abs/', 1)[-1]
+    return re.sub(r'v\d+$', '', tail)
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    return elem.text.strip() if elem is not None and elem.text else ''
+
+
+def _entry_to_paper(entry: ET.Element) -> Dict:
+    url = _text(entry.find(ATOM + 'id'))
+    primary = entry.find(ARXIV + 'primary_category')
+    paper = {
+        'arxiv_id': arxiv_id(url),
+        'url': url,
+        'title': _text(entry.find(ATOM + 'title')),
+        'authors': [_text(author.find(ATOM + 'name')) for author in entry.iter(ATOM + 'author')],
+        'date': _text(entry.find(ATOM + 'published')),
+        'pdf_url': None,
+        'abstract': ' '.join(_text(entry.find(ATOM + 'summary')).split()) or None,
+        'categories': [c.get('term') for c in entry.iter(ATOM + 'category') if c.get('term')],
+        'primary_category': primary.get('term') if primary is not None else None
+    }
+
+    # Find PDF link
+    for link in entry.iter(ATOM + 'link'):
+        if link.get('title') == 'pdf':
+            paper['pdf_url'] = link.get('href')
+            break
+
+    return paper
+
+
+def parse_feed_stream(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Incrementally parse an arXiv Atom response, yielding one paper per <entry>.
+
+    Bytes are fed to a pull parser as they arrive, and each entry is dropped
+    from the tree once converted, so memory stays bounded by one entry rather
+    than the whole page.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = elem
+            elif elem.tag == ATOM + 'entry':
+                yield _entry_to_paper(elem)
+                elem.clear()
+                root.remove(elem)
+    parser.close()
+
+
+def parse_feed(content: bytes) -> List[Dict]:
+    """Parse one complete Atom response from the arXiv API into paper dicts"""
+    return list(parse_feed_stream([content]))
+
+
+def api_fetcher() -> Fetcher:
+    """Single-connection fetcher paced to arXiv's API etiquette"""
+    return Fetcher(max_workers=1, rate=1 / API_DELAY, burst=1)
+
+
+def fetch_page(category: str, start: int, page_size: int, fetcher: Fetcher) -> List[Dict]:
+    """Fetch one page of the newest papers in `category`, beginning at offset `start`"""
+    params = {
+        "search_query": f"cat:{category}",
+        "sortBy": "submittedDate",
+        "sortOrder": "descending",
+        "start": start,
+        "max_results": page_size
+    }
+    with instrument.span('feed_page', start=start) as info, \
+            fetcher.get(ARXIV_API_URL, params=params, stream=True) as response:
+        papers = list(parse_feed_stream(response.iter_content(CHUNK_SIZE)))
+        info['items'] = len(papers)
+        return papers
+
+
+def iter_pages(category: str, max_results: int, start: int = 0,
+               page_size: int = PAGE_SIZE,
+               fetcher: Optional[Fetcher] = None) -> Iterator[Tuple[int, List[Dict]]]:
+    """Yield (next_start, papers) for each page until `max_results` or the feed runs out"""
+    fetcher = fetcher or api_fetcher()
+    while start < max_results:
+        papers = fetch_page(category, start, min(page_size, max_results - start), fetcher)
+        if not papers:
+            return
+        start += len(papers)
+        yield start, papers
+
+
+class Harvest:
+    """Append-only JSONL output plus a checkpoint, so interrupted runs can resume.
+
+    Records already in the output file are never redone: their arXiv IDs are
+    loaded on startup and used to skip papers. The checkpoint remembers the
+    next feed offset once every paper of a page has been written, and is
+    removed by `finish` when a run completes, so only an interrupted run is
+    resumed mid-feed.
+    """
+
+    def __init__(self, output_path: str, checkpoint_path: Optional[str] = None):
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+        self.done_ids: Set[str] = set()
+        self.next_start = 0
+        self._load()
+        self._out = open(output_path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if os.path.exists(self.output_path):
+            # Drop a half-written last line left behind by a crash
+            with open(self.output_path, 'rb+') as f:
+                data = f.read()
+                end = data.rfind(b'\n') + 1
+                if end != len(data):
+                    f.truncate(end)
+                    data = data[:end]
+            for line in data.decode('utf-8').splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    self.done_ids.add(record.get('arxiv_id') or arxiv_id(record['url']))
+
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.next_start = json.load(f).get('next_start', 0)
+
+    def pending(self, papers: List[Dict]) -> List[Dict]:
+        """Papers not yet written, with duplicates inside the page removed"""
+        seen = set()
+        result = []
+        for paper in papers:
+            pid = paper['arxiv_id']
+            if pid in self.done_ids or pid in seen:
+                continue
+            seen.add(pid)
+            result.append(paper)
+        return result
+
+    def write(self, record: Dict) -> None:
+        """Append one record and flush it to disk immediately"""
+        self._out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._out.flush()
+        self.done_ids.add(record.get('arxiv_id') or arxiv_id(record['url']))
+
+    def complete_page(self, next_start: int) -> None:
+        """Atomically record that everything before `next_start` is done"""
+        self.next_start = next_start
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'next_start': next_start, 'completed': len(self.done_ids)}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def finish(self) -> None:
+        """Drop the checkpoint once paging ended normally, so the next run starts at the newest papers"""
+        self.next_start = 0
+        if os.path.exists(self.checkpoint_path):
+            os.unlink(self.checkpoint_path)
+
+    def close(self) -> None:
+        self._out.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,124 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrument
+
+# Configuration
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 4.0  # Sustained rate towards arXiv
+BURST = 8  # Requests allowed back-to-back before the rate limit kicks in
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # Seconds; doubled on every retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TIMEOUT = 30
+USER_AGENT = "hw2-arxiv-crawler/1.0 (polite; rate-limited)"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/s refill, up to `capacity` banked"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            instrument.count("rate_limit_wait_ms", int(wait * 1000))
+            time.sleep(wait)
+
+
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    """Keep-alive session whose connection pool matches the worker count"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def _retry_delay(response: Optional[requests.Response], attempt: int) -> float:
+    """Honor Retry-After when the server sends it, else exponential backoff with jitter"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return BACKOFF_BASE * (2 ** attempt) * (1 + random.random() * 0.1)
+
+
+class Fetcher:
+    """Rate-limited, retrying HTTP client shared by all worker threads"""
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 max_workers: int = MAX_WORKERS,
+                 rate: float = REQUESTS_PER_SECOND,
+                 burst: int = BURST,
+                 max_retries: int = MAX_RETRIES):
+        self.session = session or make_session(max_workers)
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET with rate limiting and retries on 429/5xx and connection errors"""
+        kwargs.setdefault("timeout", TIMEOUT)
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            self.bucket.acquire()
+            instrument.count("http_requests")
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+                instrument.count("http_retries")
+                time.sleep(_retry_delay(None, attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and not last:
+                instrument.count("http_retries")
+                response.close()
+                time.sleep(_retry_delay(response, attempt))
+                continue
+            response.raise_for_status()
+            return response
+
+    def _get_or_none(self, url: str) -> Optional[requests.Response]:
+        try:
+            return self.get(url)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    def imap(self, func: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """Run `func` over items on the worker pool, yielding results in input order"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(func, items)
+
+    def map(self, func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Like `imap`, but collects the results into a list"""
+        return list(self.imap(func, items))
+
+    def fetch_all(self, urls: Iterable[str]) -> List[Optional[requests.Response]]:
+        """Fetch all URLs concurrently; results come back in input order, None on failure"""
+        return self.map(self._get_or_none, urls)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Optional
+
+import requests
+
+import instrument
+from fetcher import Fetcher
+
+# Configuration
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+MAX_AGE = 7 * 24 * 3600  # Seconds a cached response is served without revalidating
+OFFLINE = os.getenv("HTTP_CACHE_OFFLINE") == "1"  # Replay from disk only, never touch the network
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+CHUNK_SIZE = 1 << 16
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has never been cached"""
+
+
+class CachedResponse:
+    """The parts of a response the crawlers use, backed by a body file in the cache"""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], path: str, from_cache: bool):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.path = path
+        self.from_cache = from_cache
+
+    @property
+    def content(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+
+class HttpCache:
+    """On-disk HTTP cache shared by the hw2 crawlers.
+
+    Bodies are stored once under bodies/<sha256 of content>; meta/<sha256 of
+    URL>.json holds the status, validators and body hash for each URL. Fresh
+    entries (younger than `max_age`) are served straight from disk, stale ones
+    are revalidated with If-None-Match/If-Modified-Since so an unchanged page
+    costs one empty 304. With `offline=True` the network is never used, which
+    lets tests replay a previously recorded crawl.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, fetcher: Optional[Fetcher] = None,
+                 max_age: float = MAX_AGE, offline: bool = OFFLINE):
+        self.cache_dir = cache_dir
+        self.fetcher = fetcher or Fetcher()
+        self.max_age = max_age
+        self.offline = offline
+        self.bodies_dir = os.path.join(cache_dir, 'bodies')
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        os.makedirs(self.meta_dir, exist_ok=True)
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.meta_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.bodies_dir, digest)
+
+    def _load_meta(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(url), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._body_path(meta['sha256'])):
+            return None
+        return meta
+
+    def _save_meta(self, url: str, meta: Dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.meta_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(url))
+
+    def _store_body(self, response: requests.Response) -> str:
+        """Stream the body to a temp file while hashing it, then move it into place"""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.bodies_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            os.replace(tmp_path, self._body_path(digest.hexdigest()))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest.hexdigest()
+
+    def _response(self, url: str, meta: Dict, from_cache: bool) -> CachedResponse:
+        return CachedResponse(url, meta['status'], meta['headers'], self._body_path(meta['sha256']), from_cache)
+
+    def get(self, url: str, params: Optional[Dict] = None) -> CachedResponse:
+        """GET through the cache; raises like `Fetcher.get` on HTTP errors"""
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
+        meta = self._load_meta(url)
+
+        if meta and (self.offline or time.time() - meta['fetched_at'] < self.max_age):
+            instrument.count('cache_hits')
+            return self._response(url, meta, True)
+        if self.offline:
+            raise CacheMiss(url)
+
+        headers = {}
+        if meta:
+            if meta['headers'].get('ETag'):
+                headers['If-None-Match'] = meta['headers']['ETag']
+            if meta['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+
+        with instrument.span('http_fetch') as info:
+            response = self.fetcher.get(url, headers=headers, stream=True)
+            with response:
+                if response.status_code == 304 and meta:
+                    instrument.count('cache_revalidated')
+                    meta['fetched_at'] = time.time()
+                    self._save_meta(url, meta)
+                    return self._response(url, meta, True)
+
+                meta = {
+                    'url': url,
+                    'status': response.status_code,
+                    'headers': {k: response.headers[k] for k in KEPT_HEADERS if k in response.headers},
+                    'sha256': self._store_body(response),
+                    'fetched_at': time.time()
+                }
+            info['items'] = 1
+            info['bytes'] = os.path.getsize(self._body_path(meta['sha256']))
+        instrument.count('cache_misses')
+        instrument.count('http_bytes', info['bytes'])
+        self._save_meta(url, meta)
+        return self._response(url, meta, False)
+
+    def evict(self, url: str) -> None:
+        """Forget `url`, e.g. after its body failed validation, so the next `get` refetches it.
+
+        The body file is removed as well; any other URL that shared it simply
+        becomes a miss.
+        """
+        meta = self._load_meta(url)
+        for path in (self._meta_path(url), meta and self._body_path(meta['sha256'])):
+            if path and os.path.exists(path):
+                os.unlink(path)
+
+    def download(self, url: str, output_path: str) -> CachedResponse:
+        """Materialize a cached body at `output_path` (hard link when possible)"""
+        response = self.get(url)
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+        try:
+            os.link(response.path, output_path)
+        except OSError:
+            shutil.copyfile(response.path, output_path)
+        return response
@@ -0,0 +1,231 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Configuration
+TRACE_DIR = os.getenv("HW2_TRACE_DIR", "traces")  # JSONL trace per run; empty string disables the file
+PROFILE_STAGE = os.getenv("HW2_PROFILE_STAGE")  # cProfile every span of this stage
+TRACE_MALLOC = os.getenv("HW2_TRACE_MALLOC") == "1"  # Python heap peaks via tracemalloc (slows the run)
+PROFILE_TOP = 15  # Functions listed in the summary for the profiled stage
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3  # bytes on macOS, KiB elsewhere
+
+
+class Tracer:
+    """Stage spans, counters and an optional profile for one batch run.
+
+    Every span records wall time, the CPU time of the thread that ran it,
+    the RSS at its end and the number of items it handled; spans of a stage
+    running in several threads at once are all kept, so a stage's busy time
+    can exceed the run's wall time. With tracemalloc enabled, spans that do
+    not overlap another span also record their Python heap peak. Events are
+    appended to a JSONL file as they happen, so a long or crashed run can be
+    inspected afterwards; `summary()` aggregates them per stage.
+    """
+
+    def __init__(self, script: str, trace_path: Optional[str] = None,
+                 profile_stage: Optional[str] = PROFILE_STAGE, trace_malloc: bool = TRACE_MALLOC):
+        self.script = script
+        self.trace_path = trace_path
+        self.profile_stage = profile_stage
+        self.trace_malloc = trace_malloc
+        self.counters = Counter()
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'spans': 0, 'items': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'max_wall_s': 0.0,
+                     'rss_mb': 0.0, 'heap_peak_mb': 0.0})
+        self.profile = cProfile.Profile() if profile_stage else None
+        self._profiling = threading.Lock()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._out = None
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or '.', exist_ok=True)
+            self._out = open(trace_path, 'a', encoding='utf-8')
+        if trace_malloc:
+            tracemalloc.start()
+        self.event('run_start', script=script, argv=sys.argv[1:], pid=os.getpid())
+
+    def event(self, kind: str, **fields) -> None:
+        """Append one trace event and flush it"""
+        if self._out is None:
+            return
+        line = json.dumps({'event': kind, 'time': round(time.time(), 3), **fields}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._out.write(line + '\n')
+            self._out.flush()
+
+    def record(self, stage: str, wall_s: float, cpu_s: float, items: int = 0,
+               heap_peak_mb: Optional[float] = None, **attrs) -> None:
+        """Add a span measured elsewhere, e.g. by a worker process"""
+        rss = rss_mb()
+        with self._lock:
+            totals = self.stages[stage]
+            totals['spans'] += 1
+            totals['items'] += items
+            totals['wall_s'] += wall_s
+            totals['cpu_s'] += cpu_s
+            totals['max_wall_s'] = max(totals['max_wall_s'], wall_s)
+            totals['rss_mb'] = max(totals['rss_mb'], rss)
+            if heap_peak_mb is not None:
+                totals['heap_peak_mb'] = max(totals['heap_peak_mb'], heap_peak_mb)
+        event = {'stage': stage, 'wall_s': round(wall_s, 6), 'cpu_s': round(cpu_s, 6),
+                 'items': items, 'rss_mb': round(rss, 1)}
+        if heap_peak_mb is not None:
+            event['heap_peak_mb'] = round(heap_peak_mb, 2)
+        self.event('span', **event, **attrs)
+
+    @contextmanager
+    def span(self, stage: str, **attrs) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block as one span of `stage`.
+
+        Yields a dict; set its 'items' to the number of items handled, or add
+        other fields to be written with the event.
+        """
+        info: Dict[str, Any] = {'items': 0}
+        with self._lock:
+            self._active += 1
+            alone = self._active == 1
+        if self.trace_malloc and alone:
+            tracemalloc.reset_peak()
+        profiling = (self.profile is not None and stage == self.profile_stage
+                     and self._profiling.acquire(blocking=False))
+        if profiling:
+            self.profile.enable()
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield info
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            if profiling:
+                self.profile.disable()
+                self._profiling.release()
+            with self._lock:
+                alone = alone and self._active == 1
+                self._active -= 1
+            heap_peak = tracemalloc.get_traced_memory()[1] / 1e6 if self.trace_malloc and alone else None
+            items = info.pop('items')
+            self.record(stage, wall, cpu, items, heap_peak, **attrs, **info)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def summary(self) -> str:
+        """Per-stage table, counters, run totals and the profiled stage's hottest functions"""
+        wall = time.perf_counter() - self._start_wall
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        child_cpu = (children.ru_utime + children.ru_stime
+                     - self._start_children.ru_utime - self._start_children.ru_stime)
+        lines = [f"\n=== {self.script}: {wall:.1f}s wall, {time.process_time() - self._start_cpu:.1f}s CPU "
+                 f"(+{child_cpu:.1f}s in subprocesses), peak RSS {peak_rss_mb():.0f} MB ==="]
+        if self.stages:
+            lines.append(f"{'stage':<18}{'spans':>7}{'items':>8}{'busy s':>10}{'cpu s':>9}"
+                         f"{'mean s':>9}{'max s':>9}{'rss MB':>9}")
+            for stage, t in sorted(self.stages.items(), key=lambda kv: -kv[1]['wall_s']):
+                lines.append(f"{stage:<18}{t['spans']:>7}{t['items']:>8}{t['wall_s']:>10.2f}{t['cpu_s']:>9.2f}"
+                             f"{t['wall_s'] / t['spans']:>9.3f}{t['max_wall_s']:>9.3f}{t['rss_mb']:>9.0f}")
+        if self.counters:
+            lines.append("counters: " + ", ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+        if self.profile is not None and self.profile.getstats():
+            buf = io.StringIO()
+            pstats.Stats(self.profile, stream=buf).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            lines.append(f"profile of stage '{self.profile_stage}':" + buf.getvalue().split('\n', 1)[-1].rstrip())
+        return '\n'.join(lines)
+
+    def close(self) -> None:
+        totals = {stage: {k: round(v, 6) if isinstance(v, float) else v for k, v in t.items()}
+                  for stage, t in self.stages.items()}
+        self.event('summary', wall_s=round(time.perf_counter() - self._start_wall, 3),
+                   cpu_s=round(time.process_time() - self._start_cpu, 3), peak_rss_mb=round(peak_rss_mb(), 1),
+                   stages=totals, counters=dict(self.counters))
+        if self.profile is not None and self.trace_path:
+            self.profile.dump_stats(os.path.splitext(self.trace_path)[0] + f".{self.profile_stage}.prof")
+        if self.trace_malloc:
+            tracemalloc.stop()
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+
+class _NullTracer:
+    """Stands in when no run is active, so library code can trace unconditionally"""
+
+    @contextmanager
+    def span(self, stage: str, **attrs) -> Iterator[Dict[str, Any]]:
+        yield {'items': 0}
+
+    def record(self, *args, **kwargs) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def event(self, kind: str, **fields) -> None:
+        pass
+
+
+_tracer = _NullTracer()
+
+
+def tracer():
+    """The tracer of the current run (a no-op one outside `run`)"""
+    return _tracer
+
+
+def span(stage: str, **attrs):
+    return _tracer.span(stage, **attrs)
+
+
+def record(stage: str, wall_s: float, cpu_s: float, items: int = 0, **attrs) -> None:
+    _tracer.record(stage, wall_s, cpu_s, items, **attrs)
+
+
+def count(name: str, n: int = 1) -> None:
+    _tracer.count(name, n)
+
+
+@contextmanager
+def run(script: str, trace_dir: Optional[str] = TRACE_DIR) -> Iterator[Tracer]:
+    """Instrument one batch run: trace to <trace_dir>/<script>-<time>.jsonl, print a summary at the end"""
+    global _tracer
+    trace_path = None
+    if trace_dir:
+        trace_path = os.path.join(trace_dir, f"{script}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+    current = Tracer(script, trace_path)
+    _tracer = current
+    try:
+        yield current
+    finally:
+        _tracer = _NullTracer()
+        print(current.summary())
+        current.close()
+        if trace_path:
+            print(f"Trace written to {trace_path}")
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+# Configuration
+BACKEND = os.getenv("LANGID_BACKEND", "langdetect")  # "langdetect" or "fasttext"
+FASTTEXT_MODEL = os.getenv("LANGID_FASTTEXT_MODEL", "lid.176.ftz")
+SEED = 0  # Fixed langdetect seed, so a text always gets the same label
+WINDOW_CHARS = 300  # Characters per sampled window
+MAX_WINDOWS = 3  # Windows taken from long texts (start, middle, end)
+CACHE_SIZE = 1 << 16  # Texts whose result is remembered per process
+MIN_LETTERS = 20  # Shorter texts are too ambiguous to classify
+ASCII_THRESHOLD = 0.98  # Share of ASCII among letters for the English fast path
+STOPWORD_THRESHOLD = 0.15  # Share of English stopwords among words for the fast path
+SCRIPT_THRESHOLD = 0.5  # Share of letters a script needs to decide on its own
+KANA_THRESHOLD = 0.1  # Japanese mixes kana into Han, so a little kana is enough
+UNKNOWN = "unknown"
+
+ENGLISH_STOPWORDS = frozenset(
+    "the of and to in is that for with on are as by this we be it from an or at which "
+    "not can our these has have its their was were been than such also using based".split()
+)
+
+# Scripts used by a single language in practice; anything else goes to the classifier
+SCRIPT_LANGUAGES = {
+    'HANGUL': 'ko', 'HIRAGANA': 'ja', 'KATAKANA': 'ja', 'GREEK': 'el', 'HEBREW': 'he',
+    'THAI': 'th', 'GEORGIAN': 'ka', 'ARMENIAN': 'hy',
+}
+
+
+def _script(char: str) -> str:
+    """Unicode script of a letter, approximated by the first word of its name"""
+    name = unicodedata.name(char, '')
+    if name.startswith('CJK'):
+        return 'HAN'
+    return name.split(' ', 1)[0]
+
+
+def prefilter(text: str) -> Optional[str]:
+    """Decide the obvious cases without a classifier; None means "ask the classifier".
+
+    Plain-ASCII text with a fair share of English function words is English,
+    text dominated by a single-language script gets that language, and text
+    with almost no letters is unknown.
+    """
+    letters = [c for c in text if c.isalpha()]
+    if len(letters) < MIN_LETTERS:
+        return UNKNOWN
+
+    ascii_letters = sum(c.isascii() for c in letters)
+    if ascii_letters >= ASCII_THRESHOLD * len(letters):
+        words = text.lower().split()
+        stopwords = sum(w.strip('.,;:()"\'') in ENGLISH_STOPWORDS for w in words)
+        if stopwords >= STOPWORD_THRESHOLD * len(words):
+            return 'en'
+        return None
+
+    scripts = Counter(_script(c) for c in letters if not c.isascii())
+    if scripts['HIRAGANA'] + scripts['KATAKANA'] >= KANA_THRESHOLD * len(letters):
+        return 'ja'
+    script, count = scripts.most_common(1)[0]
+    if count >= SCRIPT_THRESHOLD * len(letters):
+        if script in SCRIPT_LANGUAGES:
+            return SCRIPT_LANGUAGES[script]
+        if script == 'HAN':
+            return 'zh'
+    return None
+
+
+def sample_windows(text: str, window: int = WINDOW_CHARS, max_windows: int = MAX_WINDOWS) -> str:
+    """Bounded sample of a long text: windows from its start, middle and end, cut at spaces"""
+    if len(text) <= window * max_windows:
+        return text
+    step = (len(text) - window) // (max_windows - 1) if max_windows > 1 else 0
+    pieces = []
+    for i in range(max_windows):
+        start = i * step
+        if start:
+            space = text.find(' ', start)
+            start = space + 1 if 0 <= space < start + window // 2 else start
+        end = text.rfind(' ', start, start + window)
+        pieces.append(text[start:end if end > start else start + window])
+    return ' '.join(pieces)
+
+
+def _langdetect_backend() -> Callable[[List[str]], List[str]]:
+    from langdetect import DetectorFactory, detect
+    from langdetect.lang_detect_exception import LangDetectException
+    DetectorFactory.seed = SEED
+
+    def classify(texts: List[str]) -> List[str]:
+        labels = []
+        for text in texts:
+            try:
+                labels.append(detect(text).split('-')[0])  # 'zh-cn' -> 'zh', like the other paths
+            except LangDetectException:
+                labels.append(UNKNOWN)
+        return labels
+    return classify
+
+
+def _fasttext_backend() -> Callable[[List[str]], List[str]]:
+    import fasttext
+    model = fasttext.load_model(FASTTEXT_MODEL)
+
+    def classify(texts: List[str]) -> List[str]:
+        # fastText predicts a whole batch in one call and is deterministic
+        labels, _ = model.predict([t.replace('\n', ' ') for t in texts], k=1)
+        return [label[0].replace('__label__', '') if label else UNKNOWN for label in labels]
+    return classify
+
+
+BACKENDS = {
+    'langdetect': _langdetect_backend,
+    'fasttext': _fasttext_backend,
+}
+
+
+class LanguageIdentifier:
+    """Batched language ID: prefilter, bounded sampling, classifier, result cache.
+
+    Results are cached by a hash of the text, so repeated texts (duplicated
+    crawl records, boilerplate) are classified once per process.
+    """
+
+    def __init__(self, backend: str = BACKEND, cache_size: int = CACHE_SIZE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown language ID backend: {backend}")
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._classify: Optional[Callable[[List[str]], List[str]]] = None
+        self.stats = Counter()
+
+    @property
+    def classify(self) -> Callable[[List[str]], List[str]]:
+        """Load the backend on first use only"""
+        if self._classify is None:
+            self._classify = BACKENDS[self.backend]()
+        return self._classify
+
+    def _remember(self, key: bytes, label: str) -> None:
+        self._cache[key] = label
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def detect_batch(self, texts: List[str]) -> List[str]:
+        """Language codes for `texts`, in order; UNKNOWN when undecidable"""
+        keys = [hashlib.blake2b(t.encode('utf-8', 'surrogatepass'), digest_size=16).digest() for t in texts]
+        labels: List[Optional[str]] = [None] * len(texts)
+        todo: Dict[bytes, List[int]] = {}
+        for i, (key, text) in enumerate(zip(keys, texts)):
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                labels[i] = self._cache[key]
+                self.stats['cached'] += 1
+            elif key in todo:
+                todo[key].append(i)
+                self.stats['cached'] += 1
+            else:
+                label = prefilter(text)
+                if label is not None:
+                    labels[i] = label
+                    self._remember(key, label)
+                    self.stats['prefiltered'] += 1
+                else:
+                    todo[key] = [i]
+
+        if todo:
+            samples = [sample_windows(texts[positions[0]]) for positions in todo.values()]
+            self.stats['classified'] += len(samples)
+            for (key, positions), label in zip(todo.items(), self.classify(samples)):
+                self._remember(key, label)
+                for i in positions:
+                    labels[i] = label
+        return labels
+
+    def detect(self, text: str) -> str:
+        return self.detect_batch([text])[0]
+
+
+@lru_cache(maxsize=None)
+def get_identifier(backend: str = BACKEND) -> LanguageIdentifier:
+    """Per-process shared identifier, so its cache and model outlive single chunks"""
+    return LanguageIdentifier(backend)
+
+
+def benchmark(texts: List[str], backend: str = BACKEND) -> None:
+    """Compare the full-text classifier with the prefiltered, sampled, cached stage"""
+    classify = BACKENDS[backend]()
+    start = time.perf_counter()
+    baseline = classify(texts)
+    baseline_time = time.perf_counter() - start
+
+    identifier = LanguageIdentifier(backend)
+    start = time.perf_counter()
+    labels = identifier.detect_batch(texts)
+    stage_time = time.perf_counter() - start
+
+    agree = sum(a == b for a, b in zip(baseline, labels)) / max(1, len(texts))
+    print(f"full-text {backend}: {len(texts) / baseline_time:.0f} docs/s")
+    print(f"language ID stage: {len(texts) / stage_time:.0f} docs/s "
+          f"({dict(identifier.stats)}), agreement {agree:.1%}")
+
+
+if __name__ == '__main__':
+    import sys
+    from task4 import load_data, prepare_text
+    benchmark([prepare_text(item) for item in load_data(*sys.argv[1:])])
@@ -0,0 +1,150 @@
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPLACEMENT = '[REDACTED]'
+
+def luhn_valid(number: str) -> bool:
+    """Luhn checksum over the digits of `number`"""
+    digits = [int(c) for c in number if c.isdigit()]
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return 13 <= len(digits) <= 19 and total % 10 == 0
+
+
+def phone_valid(number: str) -> bool:
+    """Formatted phone numbers only: bare 10-digit runs are more often counts or IDs"""
+    digits = sum(c.isdigit() for c in number)
+    formatted = any(c in number for c in '()+-. ')
+    return 10 <= digits <= 13 and formatted and len(set(c for c in number if c.isdigit())) > 1
+
+
+# Each detector is (name, pattern, validator). Patterns are written so the
+# combined scan stays linear: lookbehinds only let a candidate start at the
+# beginning of a run, and quantifiers are bounded, so long digit runs or long
+# dotted tokens cannot trigger catastrophic backtracking.
+DETECTORS: List[Tuple[str, str, Callable[[str], bool]]] = [
+    ('email', r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){0,8}\.[A-Za-z]{2,24}\b',
+     lambda s: True),
+    ('credit_card', r'(?<![\d-])(?<!\d )\d(?:[ -]?\d){12,18}(?![ -]?\d)', luhn_valid),
+    ('phone', r'(?<![\w+])(?:\+\d{1,3}[-. ]?)?(?:\(\d{3}\)|\d{3})[-. ]?\d{3}[-. ]?\d{4}(?!\d)', phone_valid),
+]
+
+# One alternation with a named group per detector: the text is scanned once
+COMBINED_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in DETECTORS))
+DETECTOR_RES = {name: re.compile(pattern) for name, pattern, _ in DETECTORS}
+VALIDATORS = {name: validator for name, _, validator in DETECTORS}
+
+
+def _retry(text: str, rejected: re.Match) -> Optional[Tuple[str, re.Match]]:
+    """Earliest valid match of another detector starting inside a rejected candidate.
+
+    In the alternation a candidate that fails its validator has already
+    consumed its text, so e.g. phone numbers that happen to form a card-length
+    digit run would go unredacted. The other detectors are tried at each
+    position of that span; their quantifiers are bounded, so this costs time
+    proportional to the span.
+    """
+    for start in range(rejected.start(), rejected.end()):
+        for name, regex in DETECTOR_RES.items():
+            if name == rejected.lastgroup:
+                continue
+            match = regex.match(text, start)
+            if match and VALIDATORS[name](match.group()):
+                return name, match
+    return None
+
+
+def find_pii(text: str) -> List[Dict]:
+    """Validated PII spans in `text`: [{"type", "start", "end"}], without the values themselves"""
+    spans = []
+    pos = 0
+    while True:
+        match = COMBINED_RE.search(text, pos)
+        if match is None:
+            return spans
+        kind = match.lastgroup
+        if not VALIDATORS[kind](match.group()):
+            retried = _retry(text, match)
+            if retried is None:
+                pos = match.end()
+                continue
+            kind, match = retried
+        spans.append({'type': kind, 'start': match.start(), 'end': match.end()})
+        pos = match.end()
+
+
+def redact(text: str) -> Tuple[str, Dict]:
+    """Replace every validated PII span in one pass.
+
+    Returns the redacted text and a report {"spans": [...], "counts": {type: n}}
+    whose offsets refer to the original text.
+    """
+    spans = find_pii(text)
+    if not spans:
+        return text, {'spans': [], 'counts': {}}
+
+    pieces = []
+    last = 0
+    for span in spans:
+        pieces.append(text[last:span['start']])
+        pieces.append(REPLACEMENT)
+        last = span['end']
+    pieces.append(text[last:])
+    return ''.join(pieces), {'spans': spans, 'counts': dict(Counter(s['type'] for s in spans))}
+
+
+# The patterns task4 used to apply one re.sub at a time, kept for the benchmark
+LEGACY_PATTERNS = {
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'credit_card': r'\b(?:\d[ -]*?){13,16}\b',
+    'phone': r'\b(?:\+?\d{1,3}[-. ]?)?\(?\d{3}\)?[-. ]?\d{3}[-. ]?\d{4}\b'
+}
+
+
+def legacy_redact(text: str) -> str:
+    for pattern in LEGACY_PATTERNS.values():
+        text = re.sub(pattern, REPLACEMENT, text)
+    return text
+
+
+def adversarial_inputs(size: int) -> Dict[str, str]:
+    """Inputs that are slow for naive PII regexes, each about `size` characters"""
+    def fill(unit: str) -> str:
+        return (unit * (size // len(unit) + 1))[:size]
+    return {
+        'prose': fill('We evaluate on arXiv 2507.23776 and report 87.2% accuracy over 12 runs. '),
+        'digit_run': fill('1234567890'),
+        'spaced_digits': fill('1 2 3 4 5 6 7 8 9 0 '),
+        'dashed_digits': fill('12-34-56-78-90-'),
+        'dotted_token': fill('a.b-c_d%e+'),
+        'at_soup': fill('a@b@c.d@'),
+        'mixed': fill('Contact jane.doe@example.com or +1 (555) 123-4567, card 4111 1111 1111 1111. '),
+    }
+
+
+def benchmark(sizes: Tuple[int, ...] = (2000, 20000)) -> None:
+    """Print redaction throughput on adversarial inputs, new engine vs. legacy patterns.
+
+    Running two sizes shows scaling: the engine's MB/s stays flat, while the
+    legacy patterns slow down on the inputs where they backtrack.
+    """
+    print(f"{'input':<15}{'chars':>8}{'engine MB/s':>14}{'legacy MB/s':>14}")
+    for size in sizes:
+        for name, text in adversarial_inputs(size).items():
+            rates = []
+            for func in (redact, legacy_redact):
+                start = time.perf_counter()
+                func(text)
+                rates.append(len(text) / (time.perf_counter() - start) / 1e6)
+            print(f"{name:<15}{size:>8}{rates[0]:>14.2f}{rates[1]:>14.2f}")
+
+
+if __name__ == '__main__':
+    benchmark()
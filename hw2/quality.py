@@ -0,0 +1,135 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+# Configuration
+REMOVAL_NGRAM = 3  # Repeated n-grams of this size are cut from the text
+TOP_NGRAM_SIZES = (2, 3, 4)  # Signals: share of characters in the most frequent n-gram
+DUP_NGRAM_SIZES = (5, 10)  # Signals: share of characters covered by repeated n-grams
+SYMBOLS = ('#', '...', '…')
+NON_ALPHA_WORD_RE = re.compile(r'(?<!\S)(?:[^\w\s]|[\d_])+(?!\S)')  # Whitespace tokens without a letter
+
+# Signal -> (bound, limit): documents with a signal past its limit fail the filter.
+# Repetition limits follow the Gopher rules; the others are loose enough for
+# math-heavy abstracts.
+THRESHOLDS: Dict[str, Tuple[str, float]] = {
+    'dup_line_fraction': ('max', 0.30),
+    'top_2gram_char_fraction': ('max', 0.20),
+    'top_3gram_char_fraction': ('max', 0.18),
+    'top_4gram_char_fraction': ('max', 0.16),
+    'dup_5gram_char_fraction': ('max', 0.15),
+    'dup_10gram_char_fraction': ('max', 0.10),
+    'symbol_word_ratio': ('max', 0.10),
+    'alpha_word_fraction': ('min', 0.60),
+    'mean_word_length': ('max', 15.0),
+}
+
+
+def ngrams(words: List[str], n: int) -> List[Tuple[str, ...]]:
+    """All n-grams of `words` as tuples, in position order.
+
+    The tuples are built by zip and hashed natively by sets and Counters, so
+    no joined string is ever created per n-gram.
+    """
+    return list(zip(*(words[i:] for i in range(n))))
+
+
+def remove_repeated(words: List[str], grams: List[Tuple[str, ...]], n: int) -> List[str]:
+    """Drop every n-gram that already occurred earlier in the kept text.
+
+    Scanning left to right, a repeated n-gram is removed as a whole; words
+    that never start a full n-gram (the last n-1) are kept as they are.
+    """
+    seen = set()
+    kept = []
+    i = 0
+    while i < len(grams):
+        if grams[i] in seen:
+            i += n
+            continue
+        seen.add(grams[i])
+        kept.append(words[i])
+        i += 1
+    kept.extend(words[max(i, len(grams)):])
+    return kept
+
+
+def repeated_ngram_counts(words: List[str], sizes: Iterable[int]) -> Dict[int, Counter]:
+    """N-gram counts for each size that has at least one repeated n-gram.
+
+    Sizes are visited in increasing order and the scan stops at the first
+    size without repeats: an n-gram can only repeat if its prefix does, so
+    clean text costs a single bigram count.
+    """
+    result = {}
+    for n in sorted(sizes):
+        counts = Counter(ngrams(words, n))
+        if len(counts) == max(0, len(words) - n + 1):
+            break
+        result[n] = counts
+    return result
+
+
+def repetition_signals(words: List[str], counts_by_size: Dict[int, Counter]) -> Dict[str, float]:
+    """Top- and duplicate-n-gram character fractions for the configured sizes"""
+    lengths = list(map(len, words))
+    total = sum(lengths) or 1
+
+    signals = {}
+    for n in TOP_NGRAM_SIZES:
+        fraction = 0.0
+        if n in counts_by_size:
+            top, count = counts_by_size[n].most_common(1)[0]
+            fraction = sum(map(len, top)) * count / total
+        signals[f'top_{n}gram_char_fraction'] = fraction
+
+    for n in DUP_NGRAM_SIZES:
+        fraction = 0.0
+        if n in counts_by_size:
+            counts = counts_by_size[n]
+            covered = bytearray(len(words))
+            for i, gram in enumerate(ngrams(words, n)):
+                if counts[gram] > 1:
+                    covered[i:i + n] = b'\x01' * n
+            fraction = sum(l for l, c in zip(lengths, covered) if c) / total
+        signals[f'dup_{n}gram_char_fraction'] = fraction
+    return signals
+
+
+def analyze(text: str, n: int = REMOVAL_NGRAM) -> Tuple[str, Dict[str, float]]:
+    """Quality signals of `text` and the text with repeated n-grams removed.
+
+    The text is tokenized once and each n-gram size is counted at most once,
+    shared by the removal and the signals; signals describe the text before
+    removal.
+    """
+    words = text.split()
+    counts_by_size = repeated_ngram_counts(words, {n, *TOP_NGRAM_SIZES, *DUP_NGRAM_SIZES})
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    num_words = len(words) or 1
+
+    signals = {
+        'num_words': len(words),
+        'mean_word_length': sum(map(len, words)) / num_words,
+        'alpha_word_fraction': (len(words) - len(NON_ALPHA_WORD_RE.findall(text))) / num_words,
+        'symbol_word_ratio': sum(text.count(s) for s in SYMBOLS) / num_words,
+        'dup_line_fraction': 1 - len(set(lines)) / len(lines) if lines else 0.0,
+    }
+    signals.update(repetition_signals(words, counts_by_size))
+    signals = {k: round(v, 4) if isinstance(v, float) else v for k, v in signals.items()}
+
+    if n in counts_by_size:
+        words = remove_repeated(words, ngrams(words, n), n)
+    return ' '.join(words), signals
+
+
+def failed_checks(signals: Dict[str, float], thresholds: Dict[str, Tuple[str, float]] = THRESHOLDS) -> List[str]:
+    """Names of the signals that are past their limits"""
+    failed = []
+    for name, (bound, limit) in thresholds.items():
+        value = signals.get(name)
+        if value is None:
+            continue
+        if (bound == 'max' and value > limit) or (bound == 'min' and value < limit):
+            failed.append(name)
+    return failed
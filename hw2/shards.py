@@ -0,0 +1,234 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Configuration
+SHARD_BYTES = 64 << 20  # Uncompressed bytes per shard before starting the next one
+BLOCK_BYTES = 256 << 10  # Records are compressed together in independent blocks of about this size
+COMPRESSION = "gzip"  # "zstd" (needs the zstandard package), "gzip" or "none"
+COMPRESSION_LEVEL = {"zstd": 3, "gzip": 6}
+EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.jsonl"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def compress_block(data: bytes, compression: str) -> bytes:
+    """One self-contained gzip member / zstd frame; concatenated blocks form a valid stream"""
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=COMPRESSION_LEVEL["zstd"]).compress(data)
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=COMPRESSION_LEVEL["gzip"], mtime=0)
+    return data
+
+
+def decompress_block(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data)
+    if compression == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+def doc_id(record: Dict[str, Any]) -> str:
+    """Stable document ID: the arXiv ID or URL when present, else a hash of the record"""
+    if record.get("arxiv_id"):
+        return record["arxiv_id"]
+    if record.get("url"):
+        return record["url"]
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(canonical).hexdigest()
+
+
+class ShardWriter:
+    """Size-bounded, compressed JSONL shards with a random-access index and a manifest.
+
+    Shards are written as <prefix>-00000.jsonl.gz etc. under `output_dir`.
+    Records are buffered into blocks of about `block_bytes` and each block is
+    compressed independently, so a shard is still an ordinary .gz/.zst file
+    for standard tools, yet one record can be read by decompressing only its
+    block. index.jsonl maps every document ID to (shard, block offset, block
+    size, offset and length inside the block). manifest.json lists each
+    shard with its record count, sizes and SHA-256, and is written last, so
+    its presence means the output is complete: leaving the `with` block on
+    an exception aborts instead of closing.
+    """
+
+    def __init__(self, output_dir: str, compression: str = COMPRESSION,
+                 shard_bytes: int = SHARD_BYTES, block_bytes: int = BLOCK_BYTES,
+                 prefix: str = "part"):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == "zstd":
+            _zstd()  # Fail before writing anything
+        self.output_dir = output_dir
+        self.compression = compression
+        self.shard_bytes = shard_bytes
+        self.block_bytes = block_bytes
+        self.prefix = prefix
+        self.shards: List[Dict[str, Any]] = []
+        self.count = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+        # A manifest from an earlier run would describe shards about to be overwritten
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.unlink(manifest_path)
+        self._index = open(os.path.join(output_dir, INDEX_FILE + ".tmp"), "w", encoding="utf-8")
+        self._file = None
+        self._block = bytearray()
+        self._block_entries: List[Tuple[str, int, int]] = []
+
+    def _open_shard(self) -> None:
+        name = f"{self.prefix}-{len(self.shards):05d}{EXTENSIONS[self.compression]}"
+        self._file = open(os.path.join(self.output_dir, name + ".tmp"), "wb")
+        self._shard = {"file": name, "records": 0, "bytes": 0, "uncompressed_bytes": 0}
+        self._sha256 = hashlib.sha256()
+
+    def _flush_block(self) -> None:
+        if not self._block:
+            return
+        data = compress_block(bytes(self._block), self.compression)
+        block_offset = self._shard["bytes"]
+        self._file.write(data)
+        self._sha256.update(data)
+        self._shard["bytes"] += len(data)
+        for record_id, offset, length in self._block_entries:
+            self._index.write(json.dumps({
+                "id": record_id, "shard": self._shard["file"], "block_offset": block_offset,
+                "block_size": len(data), "offset": offset, "length": length
+            }, ensure_ascii=False) + "\n")
+        self._block = bytearray()
+        self._block_entries = []
+
+    def _close_shard(self) -> None:
+        self._flush_block()
+        self._file.close()
+        path = os.path.join(self.output_dir, self._shard["file"])
+        os.replace(path + ".tmp", path)
+        self._shard["sha256"] = self._sha256.hexdigest()
+        self.shards.append(self._shard)
+        self._file = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._open_shard()
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._block_entries.append((doc_id(record), len(self._block), len(line)))
+        self._block += line
+        self._shard["records"] += 1
+        self._shard["uncompressed_bytes"] += len(line)
+        self.count += 1
+
+        if len(self._block) >= self.block_bytes:
+            self._flush_block()
+        if self._shard["uncompressed_bytes"] >= self.shard_bytes:
+            self._close_shard()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._close_shard()
+        self._index.close()
+        os.replace(self._index.name, os.path.join(self.output_dir, INDEX_FILE))
+
+        manifest = {
+            "compression": self.compression,
+            "records": self.count,
+            "index": INDEX_FILE,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "shards": self.shards
+        }
+        tmp_path = os.path.join(self.output_dir, MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.output_dir, MANIFEST_FILE))
+
+    def abort(self) -> None:
+        """Close without a manifest and remove the partial shard and index"""
+        for f in (self._file, self._index):
+            if f is not None and not f.closed:
+                f.close()
+                os.unlink(f.name)
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ShardReader:
+    """Read a ShardWriter output: whole shards for parallel jobs, or single records by ID"""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        with open(os.path.join(output_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.compression = self.manifest["compression"]
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @property
+    def shard_paths(self) -> List[str]:
+        return [os.path.join(self.output_dir, shard["file"]) for shard in self.manifest["shards"]]
+
+    @property
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        """Document ID -> index entry, loaded on first lookup"""
+        if self._index is None:
+            self._index = {}
+            with open(os.path.join(self.output_dir, self.manifest["index"]), "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._index[entry["id"]] = entry
+        return self._index
+
+    def iter_shard(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Stream the records of one shard"""
+        with open(path, "rb") as raw:
+            if self.compression == "zstd":
+                stream = _zstd().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            elif self.compression == "gzip":
+                stream = gzip.GzipFile(fileobj=raw)
+            else:
+                stream = raw
+            for line in io.TextIOWrapper(stream, encoding="utf-8"):
+                yield json.loads(line)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for path in self.shard_paths:
+            yield from self.iter_shard(path)
+
+    def get(self, record_id: str) -> Dict[str, Any]:
+        """Fetch one record by document ID, decompressing only its block"""
+        entry = self.index[record_id]
+        with open(os.path.join(self.output_dir, entry["shard"]), "rb") as f:
+            f.seek(entry["block_offset"])
+            block = decompress_block(f.read(entry["block_size"]), self.compression)
+        return json.loads(block[entry["offset"]:entry["offset"] + entry["length"]])
+
+    def verify(self) -> List[str]:
+        """Shards whose SHA-256 no longer matches the manifest"""
+        bad = []
+        for shard, path in zip(self.manifest["shards"], self.shard_paths):
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            if digest.hexdigest() != shard["sha256"]:
+                bad.append(shard["file"])
+        return bad
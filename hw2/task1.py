@@ -1,68 +1,64 @@
-import requests
-from bs4 import BeautifulSoup
 import trafilatura
 import pytesseract
 from PIL import Image
 import json
 import io
-import time
+import re
+import html
 from datetime import datetime
 import os
+import instrument
+from http_cache import HttpCache
+from arxiv_feed import Harvest, iter_pages
 
 # Configuration
-ARXIV_API_URL = "http://export.arxiv.org/api/query"
 CATEGORY = "cs.CL"  # Example category (Computing Science - Computation and Language)
 MAX_RESULTS = 200  # Number of papers to fetch
-OUTPUT_FILE = "arxiv_papers.json"
+OUTPUT_FILE = "arxiv_papers.jsonl"  # One record per line, appended as papers finish
+ABSTRACT_SOURCE = "feed"  # "feed": use the API's <summary>, no per-paper HTTP; "page": scrape abs pages
+
+# arXiv abs pages carry the abstract in a citation meta tag and in a blockquote
+CITATION_ABSTRACT_RE = re.compile(r'<meta\s+name="citation_abstract"\s+content="([^"]*)"', re.S)
+ABSTRACT_BLOCK_RE = re.compile(r'<blockquote\s+class="abstract[^"]*">(.*?)</blockquote>', re.S)
 
 # Ensure output directory exists
 os.makedirs("screenshots", exist_ok=True)
 
 def fetch_latest_papers(category, max_results=200):
-    """Fetch latest papers from arXiv API"""
-    params = {
-        "search_query": f"cat:{category}",
-        "sortBy": "submittedDate",
-        "sortOrder": "descending",
-        "max_results": max_results
-    }
-    
-    response = requests.get(ARXIV_API_URL, params=params)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.content, 'xml')
-    entries = soup.find_all('entry')
-    
+    """Fetch latest papers from arXiv API, following pages until `max_results`"""
     papers = []
-    for entry in entries:
-        paper = {
-            "url": entry.id.text,
-            "title": entry.title.text.strip(),
-            "authors": [author.find('name').text for author in entry.find_all('author')],
-            "date": entry.published.text,
-            "pdf_url": None
-        }
-        
-        # Find PDF link
-        for link in entry.find_all('link'):
-            if link.get('title') == 'pdf':
-                paper['pdf_url'] = link.get('href')
-                break
-                
-        papers.append(paper)
-    
+    for _, page in iter_pages(category, max_results):
+        papers.extend(page)
     return papers
 
-def scrape_abs_page(url):
-    """Scrape the abstract page and extract content using trafilatura"""
+def extract_abstract(page_html):
+    """Pull just the abstract out of an arXiv abs page, or None if the layout doesn't match"""
+    match = CITATION_ABSTRACT_RE.search(page_html)
+    if match:
+        text = match.group(1)
+    else:
+        match = ABSTRACT_BLOCK_RE.search(page_html)
+        if not match:
+            return None
+        text = re.sub(r'<[^>]+>', ' ', match.group(1))
+        text = re.sub(r'^\s*Abstract:', '', text)
+    
+    text = ' '.join(html.unescape(text).split())
+    return text or None
+
+def scrape_abs_page(url, cache):
+    """Scrape the abstract page with the targeted extractor, falling back to trafilatura"""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        response = cache.get(url)
+        
+        abstract = extract_abstract(response.text)
+        if abstract:
+            return {'text': abstract, 'source': 'page'}
         
         # Extract with trafilatura
         extracted = trafilatura.extract(response.text, include_links=False, output_format='json')
         if extracted:
-            return json.loads(extracted)
+            return dict(json.loads(extracted), source='trafilatura')
         return None
     except Exception as e:
         print(f"Error scraping {url}: {e}")
@@ -106,61 +102,90 @@ def extract_text_from_screenshot(url):
         print(f"OCR failed for {url}: {e}")
         return None
 
-def process_papers(papers):
-    """Process each paper to extract abstract and additional data"""
-    results = []
+def build_record(paper, abs_data):
+    """Combine feed metadata with the scraped abstract into one output record"""
+    # Try OCR as fallback if extraction fails
+    abstract = None
+    abstract_source = None
+    if abs_data and abs_data.get('text'):
+        abstract = abs_data['text']
+        abstract_source = abs_data.get('source')
+    else:
+        ocr_text = extract_text_from_screenshot(paper['url'])
+        if ocr_text:
+            abstract = ocr_text
+            abstract_source = 'ocr'
     
-    for paper in papers:
+    # Format date
+    try:
+        date_obj = datetime.strptime(paper['date'], '%Y-%m-%dT%H:%M:%SZ')
+        formatted_date = date_obj.strftime('%Y-%m-%d')
+    except:
+        formatted_date = paper['date']
+    
+    return {
+        "arxiv_id": paper['arxiv_id'],
+        "url": paper['url'],
+        "title": paper['title'],
+        "abstract": abstract,
+        "abstract_source": abstract_source,
+        "authors": paper['authors'],
+        "date": formatted_date,
+        "categories": paper.get('categories', []),
+        "pdf_url": paper['pdf_url']
+    }
+
+def process_papers(papers, cache=None, abstract_source=ABSTRACT_SOURCE):
+    """Process each paper to extract abstract and additional data.
+
+    In "feed" mode the abstract already in the API response is used and abs
+    pages are only fetched for entries without one. Abs pages are fetched
+    concurrently over one keep-alive session; the fetcher's token bucket keeps
+    us polite to arXiv instead of a fixed sleep, and the HTTP cache turns
+    reruns into disk reads or 304s.
+    Records are yielded in the same order as `papers`, as soon as each is ready.
+    """
+    cache = cache or HttpCache()
+    
+    def process_one(paper):
         print(f"Processing: {paper['title']}")
-        
-        # Scrape abstract page
-        abs_data = scrape_abs_page(paper['url'])
-        
-        # Try OCR as fallback if trafilatura fails
-        abstract = None
-        if abs_data and abs_data.get('text'):
-            abstract = abs_data['text']
-        else:
-            ocr_text = extract_text_from_screenshot(paper['url'])
-            if ocr_text:
-                abstract = ocr_text
-        
-        # Format date
-        try:
-            date_obj = datetime.strptime(paper['date'], '%Y-%m-%dT%H:%M:%SZ')
-            formatted_date = date_obj.strftime('%Y-%m-%d')
-        except:
-            formatted_date = paper['date']
-        
-        result = {
-            "url": paper['url'],
-            "title": paper['title'],
-            "abstract": abstract,
-            "authors": paper['authors'],
-            "date": formatted_date,
-            "pdf_url": paper['pdf_url']
-        }
-        
-        results.append(result)
-        time.sleep(1)  # Be polite to arXiv servers
+        with instrument.span('abstract') as info:
+            if abstract_source == 'feed' and paper.get('abstract'):
+                abs_data = {'text': paper['abstract'], 'source': 'feed'}
+            else:
+                abs_data = scrape_abs_page(paper['url'], cache)
+            info['items'] = 1
+        instrument.count(f"abstract_{(abs_data or {}).get('source') or 'missing'}")
+        return build_record(paper, abs_data)
     
-    return results
+    yield from cache.fetcher.imap(process_one, papers)
 
-def save_to_json(data, filename):
-    """Save data to JSON file"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+def harvest(category, max_results, output_file):
+    """Page through the feed, streaming records to JSONL and checkpointing each page"""
+    cache = HttpCache()
+    with Harvest(output_file) as state:
+        if state.next_start:
+            print(f"Resuming at offset {state.next_start} ({len(state.done_ids)} papers already saved)")
+        elif state.done_ids:
+            print(f"{len(state.done_ids)} papers already saved; skipping them")
+        
+        for next_start, papers in iter_pages(category, max_results, start=state.next_start):
+            pending = state.pending(papers)
+            print(f"Processing {len(pending)} new papers (feed offset {next_start})...")
+            for record in process_papers(pending, cache):
+                state.write(record)
+                instrument.count('papers_saved')
+            state.complete_page(next_start)
+        state.finish()
+        
+        return len(state.done_ids)
 
 def main():
     print(f"Fetching latest {MAX_RESULTS} papers from arXiv category {CATEGORY}")
-    papers = fetch_latest_papers(CATEGORY, MAX_RESULTS)
-    
-    print(f"Processing {len(papers)} papers...")
-    processed_data = process_papers(papers)
-    
-    print(f"Saving results to {OUTPUT_FILE}")
-    save_to_json(processed_data, OUTPUT_FILE)
+    with instrument.run('task1'):
+        total = harvest(CATEGORY, MAX_RESULTS, OUTPUT_FILE)
     
+    print(f"{total} papers saved to {OUTPUT_FILE}")
     print("Done!")
 
 if __name__ == "__main__":
@@ -1,17 +1,39 @@
 import os
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import json
-from typing import List, Dict
-import requests
-from bs4 import BeautifulSoup
+import re
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from queue import Queue
+from typing import List, Dict, Optional, Tuple
+import time
 import trafilatura
+import instrument
+from arxiv_feed import Harvest, iter_pages
+from http_cache import HttpCache
 
 # Configuration
 ARXIV_CATEGORY = "cs.CL"  # Example: computer science - computation and language
 OUTPUT_DIR = "arxiv_ocr_output"
 PDF_DIR = os.path.join(OUTPUT_DIR, "pdfs")
 TXT_DIR = os.path.join(OUTPUT_DIR, "text")
+METADATA_FILE = os.path.join(OUTPUT_DIR, "metadata.jsonl")  # Appended as papers finish
+MAX_RESULTS = 200  # Number of papers to fetch
+QUALITY_THRESHOLD = 0.5  # Pages whose text layer scores lower are OCRed
+MIN_PAGE_CHARS = 40  # Less text than this counts as an empty / image-only page
+OCR_DPI_STEPS = (200, 400)  # Rendered at the next DPI only if OCR output still scores low
+OCR_WORKERS = os.cpu_count() or 1  # Processes OCRing pages in parallel
+MAX_IN_FLIGHT_PAGES = 2 * OCR_WORKERS  # Pages queued or being OCRed at any one time
+DOWNLOAD_WORKERS = 2  # Concurrent PDF downloads (still paced by the fetcher's rate limit)
+DOWNLOAD_AHEAD = 4  # Downloaded PDFs allowed to wait for extraction
+MIN_PDF_BYTES = 1024  # Anything smaller is an error page or a truncated download
+
+WORD_RE = re.compile(r"^[(\[]?[\w'’.-]{1,30}[.,;:!?)\]%]*$")
+CID_RE = re.compile(r'\(cid:\d+\)')
+GOOD_PUNCTUATION = set(".,;:!?'\"()[]{}-–—%/=+<>*&$#@")
 
 # Ensure output directories exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -19,102 +41,305 @@ os.makedirs(PDF_DIR, exist_ok=True)
 os.makedirs(TXT_DIR, exist_ok=True)
 
 def fetch_latest_papers(category: str, max_results: int = 200) -> List[Dict]:
-    """Fetch latest papers from arXiv API"""
-    url = f"http://export.arxiv.org/api/query?search_query=cat:{category}&start=0&max_results={max_results}&sortBy=submittedDate&sortOrder=descending"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'xml')
-    
+    """Fetch latest papers from arXiv API, following pages until `max_results`"""
     papers = []
-    for entry in soup.find_all('entry'):
-        paper = {
-            'url': entry.id.text,
-            'title': entry.title.text.strip(),
-            'authors': [author.find('name').text for author in entry.find_all('author')],
-            'date': entry.published.text.split('T')[0],
-            'pdf_url': None
-        }
-        
-        # Find PDF link
-        for link in entry.find_all('link'):
-            if link.get('title') == 'pdf':
-                paper['pdf_url'] = link.get('href')
-                break
-                
-        papers.append(paper)
-    
+    for _, page in iter_pages(category, max_results):
+        papers.extend(page)
     return papers
 
-def download_pdf(url: str, output_path: str) -> bool:
-    """Download PDF from arXiv"""
+def artifact_paths(paper: Dict) -> Tuple[str, str]:
+    """PDF and text paths named by arXiv ID, so they stay valid when the feed shifts"""
+    name = paper['arxiv_id'].replace('/', '_')
+    return os.path.join(PDF_DIR, f"{name}.pdf"), os.path.join(TXT_DIR, f"{name}.txt")
+
+def is_valid_pdf(path: str) -> bool:
+    """Cheap completeness check: plausible size, %PDF- header and an %%EOF trailer"""
+    size = os.path.getsize(path)
+    if size < MIN_PDF_BYTES:
+        return False
+    with open(path, 'rb') as f:
+        if not f.read(5) == b'%PDF-':
+            return False
+        f.seek(max(0, size - 1024))
+        return b'%%EOF' in f.read()
+
+def atomic_write(path: str, text: str) -> None:
+    """Write via a temp file and rename, so `path` is either absent or complete"""
+    tmp_path = path + '.part'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def download_pdf(url: str, output_path: str, cache: HttpCache) -> bool:
+    """Download PDF from arXiv through the shared HTTP cache.
+
+    The body is streamed to disk by the cache, checked with `is_valid_pdf`
+    under a temporary name and only then renamed to `output_path`. A body
+    that fails the check is evicted from the cache so a retry refetches it.
+    """
+    tmp_path = output_path + '.part'
     try:
-        response = requests.get(url)
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+        cache.download(url, tmp_path)
+        if not is_valid_pdf(tmp_path):
+            print(f"Error downloading PDF: {url} is truncated or not a PDF")
+            os.unlink(tmp_path)
+            cache.evict(url)
+            return False
+        os.replace(tmp_path, output_path)
         return True
     except Exception as e:
         print(f"Error downloading PDF: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
         return False
 
-def pdf_to_text(pdf_path: str, output_path: str) -> None:
-    """Convert PDF to text using OCR"""
+def extract_text_layer(pdf_path: str) -> List[str]:
+    """Read the embedded text layer of every page with poppler's pdftotext"""
+    result = subprocess.run(
+        ["pdftotext", "-enc", "UTF-8", pdf_path, "-"],
+        check=True, capture_output=True
+    )
+    # pdftotext ends every page with a form feed
+    pages = result.stdout.decode('utf-8', errors='replace').split('\f')
+    return pages[:-1] if pages and not pages[-1].strip() else pages
+
+def text_quality(text: str) -> float:
+    """Score 0..1 for how much a page's text looks like real prose.
+
+    Empty or image-only pages score 0; pages whose fonts lack a usable
+    encoding (replacement characters, "(cid:NN)" glyph ids, symbol soup)
+    score low.
+    """
+    stripped = text.strip()
+    if len(stripped) < MIN_PAGE_CHARS:
+        return 0.0
+    
+    broken = stripped.count('\ufffd') + 6 * len(CID_RE.findall(stripped))
+    chars = sum(1 for c in stripped if not c.isspace())
+    good_chars = sum(1 for c in stripped if c.isalnum() or c in GOOD_PUNCTUATION) - broken
+    tokens = stripped.split()
+    wordlike = sum(1 for t in tokens if WORD_RE.match(t))
+    
+    return max(0.0, min(good_chars / chars, wordlike / len(tokens)))
+
+def _init_ocr_worker() -> None:
+    # Parallelism comes from the process pool; keep each tesseract single-threaded
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+def ocr_page(pdf_path: str, page_number: int) -> Dict:
+    """OCR one page, rendering at a higher DPI only if the low-DPI result is poor.
+
+    Only this page is rendered, straight to a temporary PNG that tesseract
+    reads from disk, so no full-resolution bitmap is held in memory. The
+    worker's own wall/CPU time is returned for the parent's trace.
+    """
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    text, quality, dpi = "", 0.0, 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dpi in OCR_DPI_STEPS:
+            image_path = convert_from_path(
+                pdf_path, dpi, first_page=page_number, last_page=page_number,
+                output_folder=tmp_dir, fmt='png', paths_only=True
+            )[0]
+            text = pytesseract.image_to_string(image_path)
+            os.unlink(image_path)
+            quality = text_quality(text)
+            if quality >= QUALITY_THRESHOLD:
+                break
+    return {'text': text, 'method': 'ocr', 'dpi': dpi, 'quality': round(quality, 3),
+            'wall_s': time.perf_counter() - start_wall, 'cpu_s': time.process_time() - start_cpu}
+
+class OcrPool:
+    """Process pool that OCRs single pages, with a cap on pages in flight.
+
+    `submit` blocks once `max_in_flight` pages are queued or running, which
+    keeps memory flat no matter how many (or how long) PDFs feed the pool.
+    """
+
+    def __init__(self, workers: int = OCR_WORKERS, max_in_flight: int = MAX_IN_FLIGHT_PAGES):
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_ocr_worker)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+
+    def submit(self, pdf_path: str, page_number: int) -> Future:
+        self.slots.acquire()
+        future = self.executor.submit(ocr_page, pdf_path, page_number)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def pdf_to_text(pdf_path: str, output_path: str, ocr_pool: OcrPool) -> Optional[List[Dict]]:
+    """Convert PDF to text, reading the text layer and OCRing only pages that need it.
+
+    Pages needing OCR are handed to `ocr_pool` together, so they run in
+    parallel with each other and with other papers' pages.
+    Writes a .pages.json listing which method produced each page and then
+    the joined text to `output_path`; both writes are atomic, and the text
+    file is written last so its existence means the paper is done. Returns
+    the per-page entries, or None on failure.
+    """
     try:
-        # Convert PDF to images
-        pages = convert_from_path(pdf_path, 500)
+        layer = extract_text_layer(pdf_path)
+        if not layer:
+            layer = [""] * pdfinfo_from_path(pdf_path)['Pages']
         
-        # Extract text from each page
-        full_text = ""
-        for page in pages:
-            text = pytesseract.image_to_string(page)
-            full_text += text + "\n\n"
+        pages = []
+        for page_number, text in enumerate(layer, 1):
+            quality = text_quality(text)
+            if quality >= QUALITY_THRESHOLD:
+                pages.append({'text': text, 'method': 'text_layer', 'dpi': None, 'quality': round(quality, 3)})
+            else:
+                pages.append(ocr_pool.submit(pdf_path, page_number))
+        
+        pages = [page.result() if isinstance(page, Future) else page for page in pages]
+        for page_number, page in enumerate(pages, 1):
+            page['page'] = page_number
+            if page['method'] == 'ocr':
+                instrument.record('ocr_page', page.pop('wall_s'), page.pop('cpu_s'), 1, dpi=page['dpi'])
+            instrument.count(f"pages_{page['method']}")
+        
+        report = [{k: v for k, v in page.items() if k != 'text'} for page in pages]
+        atomic_write(pages_report_path(output_path), json.dumps(report, indent=2))
         
         # Save to text file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
+        atomic_write(output_path, "\n\n".join(page['text'] for page in pages))
+        return report
             
     except Exception as e:
         print(f"Error processing PDF: {e}")
+        return None
+
+def pages_report_path(txt_path: str) -> str:
+    return os.path.splitext(txt_path)[0] + '.pages.json'
+
+def load_or_extract(pdf_path: str, txt_path: str, ocr_pool: OcrPool) -> Optional[List[Dict]]:
+    """Extract text if the text file doesn't exist yet, else reuse the saved page report"""
+    if not os.path.exists(txt_path):
+        return pdf_to_text(pdf_path, txt_path, ocr_pool)
+    if os.path.exists(pages_report_path(txt_path)):
+        with open(pages_report_path(txt_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+def download_stage(todo: Queue, downloaded: Queue, finished: Queue, cache: HttpCache) -> None:
+    """Download worker: todo -> downloaded; failures go straight to finished"""
+    while True:
+        paper = todo.get()
+        if paper is None:
+            return
+        pdf_path, txt_path = artifact_paths(paper)
+        with instrument.span('download') as info:
+            ok = os.path.exists(pdf_path) or download_pdf(paper['pdf_url'], pdf_path, cache)
+            info['items'] = int(ok)
+        if ok:
+            downloaded.put((paper, pdf_path, txt_path))
+        else:
+            finished.put((paper, None))
+
+def extract_stage(downloaded: Queue, finished: Queue, ocr_pool: OcrPool) -> None:
+    """Extraction worker: downloaded -> finished, OCR pages going to the shared pool"""
+    while True:
+        job = downloaded.get()
+        if job is None:
+            return
+        paper, pdf_path, txt_path = job
+        with instrument.span('extract') as info:
+            try:
+                pages = load_or_extract(pdf_path, txt_path, ocr_pool)
+            except Exception as e:
+                print(f"Error processing PDF: {e}")
+                pages = None
+            info['items'] = len(pages or [])
+        paper['local_pdf'] = pdf_path
+        paper['local_txt'] = txt_path
+        finished.put((paper, pages))
+
+def process_papers(papers: List[Dict], harvest: Harvest, cache: HttpCache, ocr_pool: OcrPool, offset: int = 0) -> int:
+    """Process papers through an overlapped download -> extract pipeline.
 
-def process_papers(papers: List[Dict]) -> None:
-    """Process all papers: download PDFs and perform OCR"""
-    results = []
+    Download and extraction workers are connected by a bounded queue, so
+    PDFs are fetched while earlier ones are being OCRed without downloads
+    running far ahead. Metadata is appended as each paper finishes; papers
+    that fail are not recorded. Returns the number of failed papers.
+    """
+    todo = Queue()
+    downloaded = Queue(maxsize=DOWNLOAD_AHEAD)
+    finished = Queue()
     
-    for i, paper in enumerate(papers, 1):
+    queued = set()
+    failed = 0
+    for i, paper in enumerate(papers, offset + 1):
+        if paper['arxiv_id'] in harvest.done_ids or paper['arxiv_id'] in queued:
+            continue
         if not paper['pdf_url']:
             print(f"Skipping {paper['title']} - no PDF available")
             continue
-            
-        print(f"Processing paper {i}/{len(papers)}: {paper['title']}")
-        
-        # Generate filenames
-        pdf_filename = f"paper_{i}.pdf"
-        txt_filename = f"paper_{i}.txt"
-        pdf_path = os.path.join(PDF_DIR, pdf_filename)
-        txt_path = os.path.join(TXT_DIR, txt_filename)
-        
-        # Download PDF
-        if not os.path.exists(pdf_path):
-            if not download_pdf(paper['pdf_url'], pdf_path):
-                continue
-        
-        # Perform OCR if text file doesn't exist
-        if not os.path.exists(txt_path):
-            pdf_to_text(pdf_path, txt_path)
+        print(f"Queued paper {i}/{MAX_RESULTS}: {paper['title']}")
+        todo.put(paper)
+        queued.add(paper['arxiv_id'])
+    
+    downloaders = [threading.Thread(target=download_stage, args=(todo, downloaded, finished, cache), daemon=True)
+                   for _ in range(DOWNLOAD_WORKERS)]
+    extractors = [threading.Thread(target=extract_stage, args=(downloaded, finished, ocr_pool), daemon=True)
+                  for _ in range(OCR_WORKERS)]
+    for worker in downloaders + extractors:
+        worker.start()
+    for _ in downloaders:
+        todo.put(None)
+    
+    for _ in range(len(queued)):
+        paper, pages = finished.get()
+        if pages is None:
+            print(f"Failed: {paper['title']}")
+            instrument.count('papers_failed')
+            failed += 1
+            continue
         
-        # Add to results
-        paper['local_pdf'] = pdf_path
-        paper['local_txt'] = txt_path
-        results.append(paper)
+        # Save metadata
+        paper['date'] = paper['date'].split('T')[0]
+        paper['ocr_pages'] = [page['page'] for page in pages if page['method'] == 'ocr']
+        paper['num_pages'] = len(pages)
+        harvest.write(paper)
+        instrument.count('papers_saved')
+        print(f"Finished: {paper['title']}")
     
-    # Save metadata
-    with open(os.path.join(OUTPUT_DIR, 'metadata.json'), 'w') as f:
-        json.dump(results, f, indent=2)
+    for _ in extractors:
+        downloaded.put(None)
+    for worker in downloaders + extractors:
+        worker.join()
+    return failed
 
 def main():
     print(f"Fetching latest papers from arXiv category: {ARXIV_CATEGORY}")
-    papers = fetch_latest_papers(ARXIV_CATEGORY)
-    
-    print(f"Processing {len(papers)} papers...")
-    process_papers(papers)
+    cache = HttpCache()
+    with instrument.run('task2'), Harvest(METADATA_FILE) as harvest, OcrPool() as ocr_pool:
+        if harvest.next_start:
+            print(f"Resuming at offset {harvest.next_start} ({len(harvest.done_ids)} papers already done)")
+        elif harvest.done_ids:
+            print(f"{len(harvest.done_ids)} papers already done; skipping them")
+        
+        # The checkpoint stops at the first page with a failed paper, so the next
+        # run reads that page again and retries it; later papers are skipped by ID
+        offset = harvest.next_start
+        retry_from = None
+        for next_start, papers in iter_pages(ARXIV_CATEGORY, MAX_RESULTS, start=offset):
+            print(f"Processing {len(papers)} papers...")
+            if process_papers(papers, harvest, cache, ocr_pool, offset) and retry_from is None:
+                retry_from = offset
+            if retry_from is None:
+                harvest.complete_page(next_start)
+            offset = next_start
+        if retry_from is None:
+            harvest.finish()
+        else:
+            print(f"Some papers failed; the next run resumes at offset {retry_from} to retry them")
     
     print(f"Processing complete. Results saved in {OUTPUT_DIR}")
 
@@ -1,44 +1,154 @@
 import os
 import json
+import argparse
+import hashlib
+import threading
+from queue import Queue
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import re
 import pytesseract
-from pytube import YouTube
-import yt_dlp
-import whisper
-from PIL import Image
+from PIL import Image, ImageFilter
 import subprocess
 import tempfile
+import instrument
+from transcription import get_engine
 
 # Configuration
 WHISPER_MODEL = "base"  # Whisper model size (tiny, base, small, medium, large)
+WHISPER_BACKEND = "faster-whisper"  # "faster-whisper" (int8, much faster on CPU) or "whisper"
+VAD_FILTER = True  # Skip non-speech with faster-whisper's Silero VAD
+WORD_TIMESTAMPS = False  # Add per-word timings to each segment
 TESSERACT_CONFIG = "--psm 6"  # Tesseract config for single uniform block of text
 OUTPUT_FILE = "transcriptions.jsonl"
+SAMPLE_RATE = 16000  # Whisper's input rate
+CHUNK_SECONDS = 600  # Long audio is transcribed in chunks of about this length
+BOUNDARY_SEARCH_SECONDS = 20  # Look this far back from a chunk's end for a pause to cut at
+PARTIAL_DIR = "transcriptions.partial"  # Per-chunk results of unfinished items, for resuming
+MEDIA_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.aac', '.flac', '.ogg', '.opus', '.webm', '.mp4', '.mkv', '.mov', '.avi'}
+MANIFEST_EXTENSIONS = {'.txt', '.list', '.jsonl'}
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.aac', '.flac', '.ogg', '.opus'}
+
+# Slide OCR
+OCR_FRAMES = True  # OCR slides in video inputs (URLs then also download a video stream)
+FRAME_MODE = "scene"  # "scene": ffmpeg scene-change detection, "keyframes": every keyframe
+SCENE_THRESHOLD = 0.3  # ffmpeg scene score (0-1) needed to count as a new shot/slide
+EDGE_LEVEL = 48  # Edge strength (0-255) that counts as a strong edge
+TEXT_LIKELIHOOD_THRESHOLD = 0.01  # Minimum strong-edge fraction for a frame to be OCRed
+PHASH_DISTANCE = 6  # Frames within this many differing hash bits are the same slide
+PTS_TIME_RE = re.compile(r'pts_time:([\d.]+)')
+
+# Pipeline sizing
+CPU_COUNT = os.cpu_count() or 1
+ACQUIRE_WORKERS = 4  # Downloads / local file checks (network bound)
+FRAME_WORKERS = max(1, CPU_COUNT // 4)  # Scene detection + slide OCR
+DECODE_WORKERS = max(1, CPU_COUNT // 4)  # ffmpeg decodes to 16 kHz PCM
+TRANSCRIBE_WORKERS = max(1, CPU_COUNT // 4)  # Parallel transcribe calls sharing one model (faster-whisper only)
+QUEUE_SIZE = 2  # Items allowed to wait between stages
 
 def download_youtube_audio(url, output_dir):
-    """Download audio from YouTube video using yt-dlp"""
+    """Download the best audio stream from a YouTube video using yt-dlp.
+
+    The stream is kept in its original container (m4a/webm/opus); ffmpeg
+    decodes it straight to 16 kHz PCM later, so there is no lossy MP3 step.
+    """
+    import yt_dlp
+    
     ydl_opts = {
         'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
         'outtmpl': os.path.join(output_dir, '%(id)s.%(ext)s'),
         'quiet': True,
     }
     
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=True)
-        audio_path = ydl.prepare_filename(info).replace('.webm', '.mp3').replace('.m4a', '.mp3')
+        audio_path = ydl.prepare_filename(info)
         return audio_path, info['id'], info['title']
 
-def extract_frames_with_text(video_url, output_dir):
-    """Extract frames that might contain text using ffmpeg"""
-    # This is a placeholder - in a real implementation, you'd need to:
-    # 1. Download the video
-    # 2. Use ffmpeg to extract frames at a reasonable interval
-    # 3. Use OpenCV or similar to detect frames with potential text
-    # For this example, we'll just return an empty list
-    return []
+def download_youtube_video(url, output_dir):
+    """Download a video-only stream (capped at 720p) for slide OCR"""
+    import yt_dlp
+    
+    ydl_opts = {
+        'format': 'bestvideo[height<=720]/best[height<=720]',
+        'outtmpl': os.path.join(output_dir, '%(id)s.video.%(ext)s'),
+        'quiet': True,
+    }
+    
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info)
+
+def sample_frames(video_path, output_dir):
+    """Write one PNG per scene change (or per keyframe) and return [(frame_path, timestamp)].
+
+    ffmpeg does the selection, so only candidate frames are ever decoded to
+    images; audio-only inputs simply yield no frames.
+    """
+    frames_dir = tempfile.mkdtemp(dir=output_dir)
+    if FRAME_MODE == "scene":
+        # Always keep the first frame, then every frame that differs enough from the previous one
+        cmd = ["ffmpeg", "-nostdin", "-i", video_path,
+               "-vf", f"select='eq(n,0)+gt(scene,{SCENE_THRESHOLD})',showinfo"]
+    else:
+        cmd = ["ffmpeg", "-nostdin", "-skip_frame", "nokey", "-i", video_path, "-vf", "showinfo"]
+    cmd += ["-vsync", "vfr", os.path.join(frames_dir, "%06d.png")]
+    
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return []
+    timestamps = [float(t) for t in PTS_TIME_RE.findall(proc.stderr)]
+    frame_paths = [os.path.join(frames_dir, name) for name in sorted(os.listdir(frames_dir))]
+    return list(zip(frame_paths, timestamps))
+
+def text_likelihood(image):
+    """Fraction of strong edges in a downscaled copy; slides with text score high, faces/blank frames low"""
+    gray = image.convert('L')
+    gray.thumbnail((320, 320))
+    edges = np.asarray(gray.filter(ImageFilter.FIND_EDGES))[1:-1, 1:-1]  # FIND_EDGES marks the border
+    return float((edges > EDGE_LEVEL).mean())
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+DCT_32 = _dct_matrix(32)
+
+def phash(image):
+    """64-bit perceptual hash: sign of the low-frequency DCT terms against their median"""
+    pixels = np.asarray(image.convert('L').resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (DCT_32 @ pixels @ DCT_32.T)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def extract_frames_with_text(video_path, output_dir):
+    """Pick the distinct frames worth OCRing: [{"frame_path", "timestamp"}].
+
+    Candidates come from ffmpeg scene detection (or keyframes), frames that
+    don't look like text are dropped, and frames whose perceptual hash is
+    within PHASH_DISTANCE of an already kept frame are treated as the same
+    slide, so Tesseract runs once per distinct slide.
+    """
+    if os.path.splitext(video_path)[1].lower() in AUDIO_EXTENSIONS:
+        return []
+    
+    kept_hashes = []
+    frames = []
+    for frame_path, timestamp in sample_frames(video_path, output_dir):
+        with Image.open(frame_path) as image:
+            likely_text = text_likelihood(image) >= TEXT_LIKELIHOOD_THRESHOLD
+            frame_hash = phash(image) if likely_text else None
+        if not likely_text or any(hamming(frame_hash, h) <= PHASH_DISTANCE for h in kept_hashes):
+            os.unlink(frame_path)
+            continue
+        kept_hashes.append(frame_hash)
+        frames.append({"frame_path": frame_path, "timestamp": round(timestamp, 3)})
+    return frames
 
 def ocr_image(image_path):
     """Extract text from an image using Tesseract OCR"""
@@ -50,68 +160,391 @@ def ocr_image(image_path):
         print(f"OCR failed for {image_path}: {str(e)}")
         return ""
 
+def transcription_engine():
+    """The process-wide Whisper engine; the model is loaded on first use only"""
+    return get_engine(WHISPER_MODEL, backend=WHISPER_BACKEND, vad_filter=VAD_FILTER,
+                      word_timestamps=WORD_TIMESTAMPS, num_workers=TRANSCRIBE_WORKERS)
+
 def transcribe_audio(audio_path):
     """Transcribe audio using Whisper"""
-    model = whisper.load_model(WHISPER_MODEL)
-    result = model.transcribe(audio_path)
-    return result
+    return transcription_engine().transcribe(audio_path)
 
-def process_youtube_video(url):
-    """Process a single YouTube video"""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        print(f"Processing {url}...")
-        
-        # Download audio
-        audio_path, video_id, video_title = download_youtube_audio(url, temp_dir)
-        
-        # Extract frames with text (placeholder implementation)
-        frames = extract_frames_with_text(url, temp_dir)
-        ocr_results = []
-        
-        for frame_path in frames:
-            text = ocr_image(frame_path)
+def transcribe_files(audio_paths):
+    """Transcribe a list of local audio files in one model session, as (path, result) pairs"""
+    return list(transcription_engine().transcribe_many(audio_paths))
+
+def decode_to_pcm(media_path, pcm_path):
+    """Decode any audio/video container straight to raw 16 kHz mono s16le PCM on disk"""
+    cmd = ["ffmpeg", "-nostdin", "-y", "-threads", "0", "-i", media_path, "-vn",
+           "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), pcm_path]
+    subprocess.run(cmd, capture_output=True, check=True)
+
+def chunk_bounds(samples):
+    """Split samples into ~CHUNK_SECONDS pieces, cutting at the quietest pause near each boundary.
+
+    A light energy VAD: 30 ms frame energies in the last BOUNDARY_SEARCH_SECONDS
+    of each chunk are smoothed over ~300 ms, and the cut goes at the minimum,
+    so chunks end in a pause rather than mid-word.
+    """
+    chunk = CHUNK_SECONDS * SAMPLE_RATE
+    search = min(BOUNDARY_SEARCH_SECONDS * SAMPLE_RATE, chunk // 2)
+    frame = SAMPLE_RATE * 30 // 1000
+    total = len(samples)
+    start = 0
+    while start < total:
+        end = start + chunk
+        if end >= total:
+            yield start, total
+            return
+        window = samples[end - search:end].astype(np.float32)
+        frames = len(window) // frame
+        energy = (window[:frames * frame].reshape(frames, frame) ** 2).mean(axis=1)
+        energy = np.convolve(energy, np.ones(10) / 10, mode='same')
+        cut = end - search + int(np.argmin(energy)) * frame + frame // 2
+        yield start, cut
+        start = cut
+
+def shift_segments(segments, offset):
+    """Move segment (and word) timestamps from chunk time to file time"""
+    for segment in segments:
+        segment['start'] += offset
+        segment['end'] += offset
+        for word in segment.get('words') or []:
+            word['start'] += offset
+            word['end'] += offset
+    return segments
+
+def transcribe_pcm(pcm_path, partial_path):
+    """Transcribe a PCM file chunk by chunk, streaming samples from disk.
+
+    Each finished chunk is appended to `partial_path`, and chunks already
+    there are skipped, so a crash part-way through a long lecture only
+    loses the chunk in progress.
+    """
+    done = {}
+    if os.path.exists(partial_path):
+        with open(partial_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        for line in lines:
+            if not line.endswith('\n'):
+                # Half-written last line from a crash: keep only the complete records
+                with open(partial_path, 'w', encoding='utf-8') as f:
+                    f.writelines(lines[:-1])
+                break
+            record = json.loads(line)
+            done[record['chunk_start']] = record
+    
+    engine = transcription_engine()
+    samples = np.memmap(pcm_path, dtype=np.int16, mode='r') if os.path.getsize(pcm_path) else np.zeros(0, np.int16)
+    chunks = []
+    with open(partial_path, 'a', encoding='utf-8') as partial:
+        for start, end in chunk_bounds(samples):
+            if start not in done:
+                result = engine.transcribe(samples[start:end].astype(np.float32) / 32768.0)
+                done[start] = {
+                    "chunk_start": start,
+                    "chunk_end": end,
+                    "language": result.get('language'),
+                    "text": result['text'].strip(),
+                    "segments": shift_segments(result['segments'], start / SAMPLE_RATE)
+                }
+                partial.write(json.dumps(done[start], ensure_ascii=False) + '\n')
+                partial.flush()
+            chunks.append(done[start])
+    
+    return {
+        "text": " ".join(chunk['text'] for chunk in chunks if chunk['text']),
+        "language": chunks[0]['language'] if chunks else None,
+        "segments": [segment for chunk in chunks for segment in chunk['segments']]
+    }
+
+def is_url(source):
+    return source.startswith(("http://", "https://"))
+
+def expand_sources(inputs):
+    """Turn URLs, media files, directories and manifests into a flat list of sources.
+
+    Directories contribute their media files (recursively, sorted). Manifests
+    (.txt/.list: one source per line; .jsonl: objects with "path" or "url")
+    may list any of these; relative paths are resolved against the manifest.
+    """
+    sources = []
+    for item in inputs:
+        ext = os.path.splitext(item)[1].lower()
+        if is_url(item):
+            sources.append(item)
+        elif os.path.isdir(item):
+            for root, _, files in sorted(os.walk(item)):
+                sources.extend(os.path.join(root, name) for name in sorted(files)
+                               if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS)
+        elif ext in MANIFEST_EXTENSIONS:
+            base = os.path.dirname(item)
+            entries = []
+            with open(item, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    if ext == '.jsonl':
+                        record = json.loads(line)
+                        line = record.get('path') or record.get('url')
+                    entries.append(line if is_url(line) else os.path.join(base, line))
+            sources.extend(expand_sources(entries))
+        elif os.path.isfile(item):
+            sources.append(item)
+        else:
+            print(f"Skipping {item}: not a URL, media file, directory or manifest")
+    return sources
+
+def acquire(item):
+    """Stage 1: get the media onto local disk (download URLs, pass local files through)"""
+    source = item['source']
+    print(f"Processing {source}...")
+    if is_url(source):
+        item['media_path'], item['video_id'], item['video_title'] = download_youtube_audio(source, item['temp_dir'])
+        item['downloaded'] = True
+        if OCR_FRAMES:
+            # Slides are secondary: without a video stream the item is still transcribed
+            try:
+                item['video_path'] = download_youtube_video(source, item['temp_dir'])
+            except Exception as e:
+                print(f"Slide OCR skipped for {source}: video download failed: {e}")
+                instrument.count('slide_ocr_failed')
+    else:
+        if not os.path.isfile(source):
+            raise FileNotFoundError(source)
+        item['media_path'] = source
+        item['video_id'] = os.path.splitext(os.path.basename(source))[0]
+        item['video_title'] = os.path.basename(source)
+        if OCR_FRAMES:
+            item['video_path'] = source
+    return item
+
+def ocr_frames(item):
+    """Stage 2: OCR each distinct slide once, keeping its timestamp.
+
+    A failure here only loses the slides: the item goes on to be
+    transcribed with empty OCR results.
+    """
+    item['ocr_results'] = []
+    video_path = item.get('video_path')
+    if not video_path:
+        return item
+    
+    try:
+        for frame in extract_frames_with_text(video_path, item['temp_dir']):
+            text = ocr_image(frame['frame_path'])
+            os.unlink(frame['frame_path'])
             if text:
-                ocr_results.append({
-                    "frame_path": frame_path,
+                item['ocr_results'].append({
+                    "timestamp": frame['timestamp'],
                     "text": text
                 })
+    except Exception as e:
+        print(f"Slide OCR failed for {item['source']}: {e}")
+        instrument.count('slide_ocr_failed')
+        item['ocr_results'] = []
+    finally:
+        if item.get('downloaded') and os.path.exists(video_path):
+            os.unlink(video_path)
+    return item
+
+def decode(item):
+    """Stage 3: decode to 16 kHz mono PCM on disk, dropping the downloaded file afterwards"""
+    key = hashlib.sha1(item['source'].encode('utf-8')).hexdigest()[:16]
+    item['pcm_path'] = os.path.join(item['temp_dir'], f"{key}.pcm")
+    item['partial_path'] = os.path.join(PARTIAL_DIR, f"{key}.jsonl")
+    decode_to_pcm(item['media_path'], item['pcm_path'])
+    if item.get('downloaded'):
+        os.unlink(item['media_path'])
+    return item
+
+def transcribe(item):
+    """Stage 4: transcribe the PCM in chunks with the shared model"""
+    item['audio_transcription'] = transcribe_pcm(item['pcm_path'], item['partial_path'])
+    instrument.count('audio_seconds', os.path.getsize(item['pcm_path']) // (2 * SAMPLE_RATE))
+    os.unlink(item['pcm_path'])
+    return item
+
+def run_stage(func, inbox, outbox, workers):
+    """Start `workers` threads applying `func` to (index, item) pairs from inbox.
+
+    Items that failed upstream (carrying an "error") pass through untouched.
+    Each call is traced as a span named after `func`.
+    Returns the threads; each stops when it reads None.
+    """
+    def work():
+        while True:
+            job = inbox.get()
+            if job is None:
+                return
+            index, item = job
+            if 'error' not in item:
+                try:
+                    with instrument.span(func.__name__, source=item['source']) as info:
+                        item = func(item)
+                        info['items'] = 1
+                except Exception as e:
+                    item['error'] = str(e)
+                    instrument.count(f"{func.__name__}_failed")
+            outbox.put((index, item))
+    
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def stop_after(threads, inbox, workers):
+    """Once `threads` finish, stop the next stage's `workers` threads"""
+    def close():
+        for thread in threads:
+            thread.join()
+        for _ in range(workers):
+            inbox.put(None)
+    threading.Thread(target=close, daemon=True).start()
+
+def unique_sources(sources):
+    """Drop repeated sources, keeping the first; local paths are compared after resolving them.
+
+    Items are keyed by source for their PCM and partial files, so a file
+    listed twice (e.g. by a directory and a manifest) must be queued once.
+    """
+    seen = set()
+    result = []
+    for source in sources:
+        key = source if is_url(source) else os.path.realpath(source)
+        if key not in seen:
+            seen.add(key)
+            result.append(source)
+    return result
+
+def source_video_id(source):
+    """The video_id `acquire` will give a source, when it can be told without downloading"""
+    if not is_url(source):
+        return os.path.splitext(os.path.basename(source))[0]
+    url = urlparse(source)
+    if url.hostname and url.hostname.endswith('youtu.be'):
+        return url.path.strip('/') or None
+    return parse_qs(url.query).get('v', [None])[0]
+
+def load_done_sources(output_file):
+    """Sources and legacy video IDs already in `output_file`, dropping a half-written last line.
+
+    Records written before sources were recorded only carry a video_id;
+    those are returned separately so the items are not transcribed again.
+    """
+    sources, legacy_ids = set(), set()
+    if not os.path.exists(output_file):
+        return sources, legacy_ids
+    with open(output_file, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            f.truncate(end)
+            data = data[:end]
+    for line in data.decode('utf-8').splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get('source'):
+            sources.add(record['source'])
+        elif record.get('video_id'):
+            legacy_ids.add(record['video_id'])
+    return sources, legacy_ids
+
+def process_sources(sources, output_file):
+    """Run acquire -> slide OCR -> decode -> transcribe concurrently, writing JSONL in input order.
+
+    Stages are connected by bounded queues, so downloads, OCR, ffmpeg
+    decoding and Whisper all run at once without any stage racing ahead.
+    Results are appended, and sources already in `output_file` are skipped,
+    so a rerun after a crash only does the unfinished items.
+    """
+    sources = unique_sources(sources)
+    done, legacy_ids = load_done_sources(output_file)
+    if done or legacy_ids:
+        remaining = [source for source in sources
+                     if source not in done and source_video_id(source) not in legacy_ids]
+        print(f"Skipping {len(sources) - len(remaining)} sources already in {output_file}")
+        sources = remaining
+    if not sources:
+        return
+    
+    # Create the shared engine before the workers race for it; it says how many calls it can serve at once
+    transcribe_workers = transcription_engine().num_workers
+    os.makedirs(PARTIAL_DIR, exist_ok=True)
+    
+    todo = Queue()
+    acquired = Queue(maxsize=QUEUE_SIZE)
+    ocred = Queue(maxsize=QUEUE_SIZE)
+    decoded = Queue(maxsize=QUEUE_SIZE)
+    finished = Queue()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        acquirers = run_stage(acquire, todo, acquired, ACQUIRE_WORKERS)
+        frame_ocrs = run_stage(ocr_frames, acquired, ocred, FRAME_WORKERS)
+        decoders = run_stage(decode, ocred, decoded, DECODE_WORKERS)
+        transcribers = run_stage(transcribe, decoded, finished, transcribe_workers)
+        stop_after(acquirers, acquired, FRAME_WORKERS)
+        stop_after(frame_ocrs, ocred, DECODE_WORKERS)
+        stop_after(decoders, decoded, transcribe_workers)
         
-        # Transcribe audio
-        whisper_result = transcribe_audio(audio_path)
+        for index, source in enumerate(sources):
+            todo.put((index, {'source': source, 'temp_dir': temp_dir}))
+        for _ in acquirers:
+            todo.put(None)
         
-        # Prepare final result
-        result = {
-            "video_id": video_id,
-            "video_title": video_title,
-            "audio_transcription": whisper_result,
-            "ocr_results": ocr_results
-        }
+        # Completed items can arrive out of order; hold them until it's their turn
+        pending = {}
+        next_index = 0
+        with open(output_file, 'a', encoding='utf-8') as f:
+            for _ in sources:
+                index, item = finished.get()
+                pending[index] = item
+                while next_index in pending:
+                    item = pending.pop(next_index)
+                    next_index += 1
+                    if 'error' in item:
+                        print(f"Failed to process {item['source']}: {item['error']}")
+                        continue
+                    result = {
+                        "video_id": item['video_id'],
+                        "video_title": item['video_title'],
+                        "source": item['source'],
+                        "audio_transcription": item['audio_transcription'],
+                        "ocr_results": item['ocr_results']
+                    }
+                    f.write(json.dumps(result, ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.unlink(item['partial_path'])
+                    print(f"Completed processing: {result['video_title']}")
         
-        return result
+        for thread in transcribers:
+            thread.join()
 
 def main():
-    # List of YouTube URLs to process
+    parser = argparse.ArgumentParser(description="Transcribe and OCR lecture videos")
+    parser.add_argument("inputs", nargs="*",
+                        help="YouTube URLs, local media files, directories or manifests (.txt/.list/.jsonl)")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="JSONL output file")
+    args = parser.parse_args()
+    
+    # List of YouTube URLs to process when nothing is given on the command line
     youtube_urls = [
         # Add your 10 YouTube URLs here
         # "https://www.youtube.com/watch?v=...",
         # ...
     ]
     
-    if not youtube_urls:
-        print("Please add YouTube URLs to the youtube_urls list")
+    sources = expand_sources(args.inputs) if args.inputs else youtube_urls
+    if not sources:
+        print("Please pass media files/URLs or add YouTube URLs to the youtube_urls list")
         return
     
-    # Process each video
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        for url in youtube_urls:
-            try:
-                result = process_youtube_video(url)
-                f.write(json.dumps(result, ensure_ascii=False) + '\n')
-                print(f"Completed processing: {result['video_title']}")
-            except Exception as e:
-                print(f"Failed to process {url}: {str(e)}")
+    with instrument.run('task3'):
+        process_sources(sources, args.output)
     
-    print(f"All done! Results saved to {OUTPUT_FILE}")
+    print(f"All done! Results saved to {args.output}")
 
 if __name__ == "__main__":
     # Check for required dependencies
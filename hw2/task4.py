@@ -1,183 +1,382 @@
 import json
 import jsonlines
-from langdetect import detect
 from datasketch import MinHash, MinHashLSH
 import re
-from typing import List, Dict, Any
+import os
+import pickle
+import argparse
+import time
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, TextIO, Tuple
+
+import instrument
+from language_id import BACKEND as LANGID_BACKEND, BACKENDS, get_identifier
+from pii import redact
+from quality import analyze, failed_checks, ngrams, remove_repeated
+from shards import COMPRESSION, EXTENSIONS, SHARD_BYTES, ShardWriter, doc_id
 
 # Constants
 SIMILARITY_THRESHOLD = 0.7
-PII_PATTERNS = {
-    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-    'credit_card': r'\b(?:\d[ -]*?){13,16}\b',
-    'phone': r'\b(?:\+?\d{1,3}[-. ]?)?\(?\d{3}\)?[-. ]?\d{3}[-. ]?\d{4}\b'
-}
-
-def load_data(task1_json: str, task2_json: str, task3_jsonl: str) -> List[Dict[str, Any]]:
-    """Load data from all three task outputs"""
-    combined_data = []
-    
-    # Load Task 1 data
-    with open(task1_json, 'r') as f:
-        combined_data.extend(json.load(f))
-    
-    # Load Task 2 data
-    with open(task2_json, 'r') as f:
-        combined_data.extend(json.load(f))
-    
-    # Load Task 3 data
-    with open(task3_jsonl, 'r') as f:
-        for line in jsonlines.Reader(f):
-            combined_data.append(line)
-    
-    return combined_data
+NUM_PERM = 128
+SHINGLE_SIZE = 3  # Words per shingle for MinHash
+DEDUP_BATCH = 512  # Documents hashed together by MinHash.bulk
+DEDUP_INDEX = 'dedup_index.pkl'  # LSH state carried across runs
+WORKERS = os.cpu_count() or 1  # Cleaning processes
+CHUNK_SIZE = 256  # Items per worker task
+MAX_PENDING_CHUNKS = 2  # Chunks queued per worker; bounds memory in flight
+READ_SIZE = 1 << 16  # Characters read at a time from JSON array inputs
+OUTPUT_DIR = 'processed'  # Sharded JSONL output, index and manifest
+QUALITY_MODE = 'drop'  # Documents failing quality thresholds: 'drop', 'flag' or 'off'
+
+def iter_json_array(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buf = f.read(READ_SIZE).lstrip()
+    if not buf.startswith('['):
+        raise ValueError(f"{getattr(f, 'name', 'input')} is not a JSON array")
+    buf = buf[1:]
+    eof = False
+    while True:
+        buf = buf.lstrip().lstrip(',').lstrip()
+        if buf.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            buf += chunk
+            continue
+        yield obj
+        buf = buf[end:]
 
-def detect_language(text: str) -> str:
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a JSON array or, for .jsonl files, one record per line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            yield from jsonlines.Reader(f)
+        else:
+            yield from iter_json_array(f)
+
+def load_data(*paths: str) -> Iterator[Dict[str, Any]]:
+    """Stream data from all task outputs, one record at a time"""
+    for path in paths:
+        yield from read_records(path)
+
+def detect_language(text: str, backend: str = LANGID_BACKEND) -> str:
     """Detect language of text"""
-    try:
-        return detect(text)
-    except:
-        return "unknown"
+    return get_identifier(backend).detect(text)
 
 def remove_pii(text: str) -> str:
     """Remove personally identifiable information"""
-    for pattern in PII_PATTERNS.values():
-        text = re.sub(pattern, '[REDACTED]', text)
-    return text
+    return redact(text)[0]
 
 def remove_repetitive_ngrams(text: str, n: int = 3) -> str:
     """Remove repetitive n-grams"""
     words = text.split()
-    seen_ngrams = set()
-    cleaned_words = []
-    
-    for i in range(len(words) - n + 1):
-        ngram = ' '.join(words[i:i+n])
-        if ngram in seen_ngrams:
-            continue
-        seen_ngrams.add(ngram)
-        cleaned_words.append(words[i])
-    
-    # Add remaining words
-    if len(words) >= n:
-        cleaned_words.extend(words[-(n-1):])
-    else:
-        cleaned_words.extend(words[len(cleaned_words):])
-    
-    return ' '.join(cleaned_words)
+    return ' '.join(remove_repeated(words, ngrams(words, n), n))
 
 def clean_html(text: str) -> str:
     """Basic HTML tag removal"""
     return re.sub(r'<[^>]+>', '', text)
 
-def process_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Apply all cleaning steps to the data"""
-    processed = []
+def get_text(item: Dict[str, Any]) -> str:
+    """Text to process (prioritize abstract, then title, then content)"""
+    return item.get('abstract', '') or item.get('title', '') or item.get('content', '')
+
+def prepare_text(item: Dict[str, Any]) -> str:
+    """Text of an item with HTML removed, as seen by language ID and the later steps"""
+    return clean_html(get_text(item))
+
+def clean_item(item: Dict[str, Any], lang: Optional[str] = None,
+               quality_mode: str = QUALITY_MODE) -> Optional[Dict[str, Any]]:
+    """Apply all cleaning steps to one item; None if it should be dropped.
+
+    `lang` is the item's language when it was already identified for the
+    whole batch (see `clean_chunk`). Quality signals are attached as
+    item['quality']; with `quality_mode='drop'` items failing a threshold
+    are dropped, with 'flag' they are kept and the failed checks listed.
+    """
+    text = get_text(item)
     
-    for item in data:
-        # Get text to process (prioritize abstract, then title, then content)
-        text = item.get('abstract', '') or item.get('title', '') or item.get('content', '')
+    # Skip if no text
+    if not text.strip():
+        return None
         
-        # Skip if no text
-        if not text.strip():
-            continue
-            
-        # Clean HTML
-        text = clean_html(text)
-        
-        # Detect language
+    # Clean HTML
+    text = clean_html(text)
+    
+    # Detect language
+    if lang is None:
         lang = detect_language(text)
-        if lang != 'en':  # Assuming we want English content
-            continue
-            
-        # Remove PII
-        text = remove_pii(text)
-        
-        # Remove repetitive n-grams
-        text = remove_repetitive_ngrams(text)
+    if lang != 'en':  # Assuming we want English content
+        return None
         
-        # Update item with cleaned data
-        cleaned_item = item.copy()
-        if 'abstract' in cleaned_item:
-            cleaned_item['abstract'] = text
-        elif 'content' in cleaned_item:
-            cleaned_item['content'] = text
-        else:
-            cleaned_item['title'] = text
-            
-        processed.append(cleaned_item)
+    # Remove PII
+    text, pii_report = redact(text)
     
-    return processed
-
-def deduplicate_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove near-duplicate documents using MinHashLSH"""
-    lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=128)
-    minhashes = {}
+    # Remove repetitive n-grams and measure quality in the same pass
+    text, signals = analyze(text)
+    failed = failed_checks(signals) if quality_mode != 'off' else []
+    if failed and quality_mode == 'drop':
+        return None
     
-    # Create MinHashes for all documents
-    for idx, item in enumerate(data):
-        text = item.get('abstract', '') or item.get('title', '') or item.get('content', '')
-        words = text.lower().split()
-        
-        mh = MinHash(num_perm=128)
-        for word in words:
-            mh.update(word.encode('utf-8'))
+    # Update item with cleaned data
+    cleaned_item = item.copy()
+    if 'abstract' in cleaned_item:
+        cleaned_item['abstract'] = text
+    elif 'content' in cleaned_item:
+        cleaned_item['content'] = text
+    else:
+        cleaned_item['title'] = text
+    if pii_report['counts']:
+        cleaned_item['pii_redactions'] = pii_report['counts']
+    if quality_mode != 'off':
+        cleaned_item['quality'] = {'signals': signals, 'failed': failed}
         
-        minhashes[idx] = mh
-        lsh.insert(idx, mh)
+    return cleaned_item
+
+def clean_chunk(chunk: List[Dict[str, Any]], langid_backend: str = LANGID_BACKEND,
+                quality_mode: str = QUALITY_MODE) -> List[Dict[str, Any]]:
+    """Worker entry point: clean one shard of items, keeping their order.
+
+    Languages of the whole shard are identified in one batch first.
+    """
+    langs = get_identifier(langid_backend).detect_batch([prepare_text(item) for item in chunk])
+    cleaned = (clean_item(item, lang, quality_mode) for item, lang in zip(chunk, langs))
+    return [item for item in cleaned if item is not None]
+
+def timed_clean_chunk(chunk: List[Dict[str, Any]], *args) -> Tuple[List[Dict[str, Any]], float, float]:
+    """`clean_chunk` plus the worker's wall and CPU seconds, for the parent's trace"""
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    cleaned = clean_chunk(chunk, *args)
+    return cleaned, time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+def record_chunk(chunk: List[Dict[str, Any]], result) -> List[Dict[str, Any]]:
+    """Trace a chunk cleaned by a worker process and return its items"""
+    cleaned, wall, cpu = result
+    instrument.record('clean_chunk', wall, cpu, len(chunk), kept=len(cleaned))
+    instrument.count('docs_in', len(chunk))
+    instrument.count('docs_cleaned', len(cleaned))
+    return cleaned
+
+def chunked(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def process_data(data: Iterable[Dict[str, Any]], workers: int = WORKERS,
+                 chunk_size: int = CHUNK_SIZE,
+                 langid_backend: str = LANGID_BACKEND,
+                 quality_mode: str = QUALITY_MODE) -> Iterator[Dict[str, Any]]:
+    """Apply all cleaning steps to the data, sharded across a process pool.
+
+    Items are cut into chunks of `chunk_size`; at most `MAX_PENDING_CHUNKS`
+    per worker are queued at once and results are yielded in input order as
+    soon as the oldest chunk is done, so memory stays bounded however large
+    the input is.
+    """
+    if workers <= 1:
+        for chunk in chunked(data, chunk_size):
+            # In-process, so the span can also be profiled (HW2_PROFILE_STAGE=clean_chunk)
+            with instrument.span('clean_chunk') as info:
+                cleaned = clean_chunk(chunk, langid_backend, quality_mode)
+                info.update(items=len(chunk), kept=len(cleaned))
+            instrument.count('docs_in', len(chunk))
+            instrument.count('docs_cleaned', len(cleaned))
+            yield from cleaned
+        return
     
-    # Find duplicates
-    duplicates = set()
-    for idx in minhashes:
-        if idx in duplicates:
-            continue
-        results = lsh.query(minhashes[idx])
-        if len(results) > 1:
-            # Keep the first one, mark others as duplicates
-            for dup_idx in results[1:]:
-                duplicates.add(dup_idx)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunked(data, chunk_size):
+            pending.append((chunk, pool.submit(timed_clean_chunk, chunk, langid_backend, quality_mode)))
+            if len(pending) >= workers * MAX_PENDING_CHUNKS:
+                chunk, future = pending.popleft()
+                yield from record_chunk(chunk, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            yield from record_chunk(chunk, future.result())
+
+def shingles(text: str, n: int = SHINGLE_SIZE) -> List[bytes]:
+    """Distinct word n-gram shingles of the lowercased text (unigrams for very short texts)"""
+    words = text.lower().split()
+    if len(words) < n:
+        return [w.encode('utf-8') for w in set(words)]
+    return list({' '.join(words[i:i + n]).encode('utf-8') for i in range(len(words) - n + 1)})
+
+class DedupIndex:
+    """MinHash LSH index of every document kept so far, optionally persisted to disk.
+
+    Loading the saved index at startup means a new crawl is deduplicated
+    against everything kept by earlier runs, not just against itself.
+    Entries are keyed by document ID, so a document kept by an earlier run
+    is recognised as itself and kept again rather than dropped as its own
+    near-duplicate.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.seen = set()  # IDs kept during this run
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.lsh = pickle.load(f)['lsh']
+        else:
+            self.lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM)
+
+    def add_if_new(self, key: str, mh: MinHash) -> bool:
+        """Insert `mh` under `key` unless a near-duplicate is already indexed; True if the document is kept"""
+        if key in self.seen:
+            return False
+        if key not in self.lsh:
+            if self.lsh.query(mh):
+                return False
+            self.lsh.insert(key, mh, check_duplication=False)
+        self.seen.add(key)
+        return True
+
+    def save(self) -> None:
+        """Atomically write the index to `path`"""
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'lsh': self.lsh}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+def deduplicate_data(data: Iterable[Dict[str, Any]], index_path: Optional[str] = None,
+                     batch_size: int = DEDUP_BATCH) -> Iterator[Dict[str, Any]]:
+    """Remove near-duplicate documents using MinHashLSH, streaming.
+
+    MinHashes over word shingles are computed a batch at a time with
+    MinHash.bulk (vectorized with numpy and shared permutations). Documents
+    are then checked and inserted one by one in input order, so the earliest
+    document always survives. With `index_path` the index is loaded before
+    and saved after the run; documents already in it are kept again, so
+    rerunning on the same input reproduces the same output.
+    """
+    index = DedupIndex(index_path)
     
-    # Return only non-duplicates
-    return [data[i] for i in range(len(data)) if i not in duplicates]
+    for batch in chunked(data, batch_size):
+        with instrument.span('dedup_batch') as info:
+            minhashes = MinHash.bulk((shingles(get_text(item)) for item in batch), num_perm=NUM_PERM)
+            kept = [item for item, mh in zip(batch, minhashes) if index.add_if_new(doc_id(item), mh)]
+            info['items'] = len(batch)
+        instrument.count('docs_deduplicated', len(batch) - len(kept))
+        yield from kept
+    
+    with instrument.span('dedup_save'):
+        index.save()
+
+def format_txt(item: Dict[str, Any]) -> str:
+    """One item as a plain text block"""
+    return (
+        f"Title: {item.get('title', 'N/A')}\n"
+        f"Authors: {', '.join(item.get('authors', ['N/A']))}\n"
+        f"Date: {item.get('date', 'N/A')}\n"
+        f"URL: {item.get('url', 'N/A')}\n"
+        f"Abstract/Content:\n{item.get('abstract', item.get('content', 'N/A'))}\n"
+        "\n" + "="*80 + "\n\n"
+    )
 
-def export_to_txt(data: List[Dict[str, Any]], filename: str):
+def format_md(item: Dict[str, Any]) -> str:
+    """One item as a Markdown section"""
+    return (
+        f"## {item.get('title', 'N/A')}\n\n"
+        f"**Authors:** {', '.join(item.get('authors', ['N/A']))}  \n"
+        f"**Date:** {item.get('date', 'N/A')}  \n"
+        f"**URL:** [{item.get('url', 'N/A')}]({item.get('url', 'N/A')})  \n\n"
+        f"**Abstract/Content:**  \n\n{item.get('abstract', item.get('content', 'N/A'))}\n\n"
+        "---\n\n"
+    )
+
+def export_to_txt(data: Iterable[Dict[str, Any]], filename: str):
     """Export data to plain text format"""
     with open(filename, 'w', encoding='utf-8') as f:
         for item in data:
-            f.write(f"Title: {item.get('title', 'N/A')}\n")
-            f.write(f"Authors: {', '.join(item.get('authors', ['N/A']))}\n")
-            f.write(f"Date: {item.get('date', 'N/A')}\n")
-            f.write(f"URL: {item.get('url', 'N/A')}\n")
-            f.write(f"Abstract/Content:\n{item.get('abstract', item.get('content', 'N/A'))}\n")
-            f.write("\n" + "="*80 + "\n\n")
-
-def export_to_md(data: List[Dict[str, Any]], filename: str):
+            f.write(format_txt(item))
+
+def export_to_md(data: Iterable[Dict[str, Any]], filename: str):
     """Export data to Markdown format"""
     with open(filename, 'w', encoding='utf-8') as f:
         for item in data:
-            f.write(f"## {item.get('title', 'N/A')}\n\n")
-            f.write(f"**Authors:** {', '.join(item.get('authors', ['N/A']))}  \n")
-            f.write(f"**Date:** {item.get('date', 'N/A')}  \n")
-            f.write(f"**URL:** [{item.get('url', 'N/A')}]({item.get('url', 'N/A')})  \n\n")
-            f.write(f"**Abstract/Content:**  \n\n{item.get('abstract', item.get('content', 'N/A'))}\n\n")
-            f.write("---\n\n")
+            f.write(format_md(item))
 
-def main():
-    # Load data from all tasks
-    data = load_data('task1_output.json', 'task2_output.json', 'task3_output.jsonl')
+def export_stream(data: Iterable[Dict[str, Any]], writer: ShardWriter,
+                  txt_filename: Optional[str] = None, md_filename: Optional[str] = None) -> int:
+    """Write each item to the shards (and the optional TXT/MD renderings) as it arrives.
+
+    Returns the number of items written.
+    """
+    count = 0
+    with ExitStack() as stack:
+        txt = stack.enter_context(open(txt_filename, 'w', encoding='utf-8')) if txt_filename else None
+        md = stack.enter_context(open(md_filename, 'w', encoding='utf-8')) if md_filename else None
+        for item in data:
+            writer.write(item)
+            if txt:
+                txt.write(format_txt(item))
+            if md:
+                md.write(format_md(item))
+            count += 1
+    return count
+
+def run_pipeline(args: argparse.Namespace) -> Tuple[int, int]:
+    """Load, clean, deduplicate and export; returns (documents, shards) written"""
+    # Load data from all tasks, lazily
+    data = load_data(*args.inputs)
     
     # Process data (clean, filter, etc.)
-    processed_data = process_data(data)
+    processed_data = process_data(data, args.workers, args.chunk_size, args.langid_backend, args.quality)
     
     # Deduplicate data
-    final_data = deduplicate_data(processed_data)
+    final_data = deduplicate_data(processed_data, args.dedup_index or None)
+    
+    # Export results as they are produced
+    with ShardWriter(args.output_dir, args.compression, int(args.shard_mb * (1 << 20))) as writer:
+        count = export_stream(final_data, writer, args.txt or None, args.md or None)
+    instrument.count('docs_exported', count)
+    return count, len(writer.shards)
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean, filter and deduplicate crawl outputs")
+    parser.add_argument("inputs", nargs="*",
+                        default=['task1_output.jsonl', 'task2_output.jsonl', 'task3_output.jsonl'],
+                        help="JSON or JSONL files to process")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Cleaning processes (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Items per worker task")
+    parser.add_argument("--langid-backend", default=LANGID_BACKEND, choices=sorted(BACKENDS),
+                        help="Language identification classifier")
+    parser.add_argument("--quality", default=QUALITY_MODE, choices=['drop', 'flag', 'off'],
+                        help="What to do with documents failing the quality thresholds")
+    parser.add_argument("--dedup-index", default=DEDUP_INDEX,
+                        help="Persistent dedup index; pass an empty string to dedup this run only")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for the JSONL shards")
+    parser.add_argument("--compression", default=COMPRESSION, choices=sorted(EXTENSIONS),
+                        help="Shard compression (zstd needs the zstandard package)")
+    parser.add_argument("--shard-mb", type=float, default=SHARD_BYTES / (1 << 20),
+                        help="Uncompressed megabytes per shard")
+    parser.add_argument("--txt", default='processed_results.txt',
+                        help="Plain text rendering; pass an empty string to skip it")
+    parser.add_argument("--md", default='processed_results.md',
+                        help="Markdown rendering; pass an empty string to skip it")
+    args = parser.parse_args()
     
-    # Export results
-    export_to_txt(final_data, 'processed_results.txt')
-    export_to_md(final_data, 'processed_results.md')
+    with instrument.run('task4'):
+        count, shard_count = run_pipeline(args)
     
-    print(f"Processing complete. Saved {len(final_data)} documents.")
-    print("Files created: processed_results.txt, processed_results.md")
+    print(f"Processing complete. Saved {count} documents in {shard_count} shards.")
+    print("Files created: " + ", ".join([os.path.join(args.output_dir, 'manifest.json')] +
+                                        [name for name in (args.txt, args.md) if name]))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Tuple
+
+# Configuration
+BACKEND = "faster-whisper"  # "faster-whisper" (CTranslate2, int8 on CPU) or "whisper" (reference implementation)
+COMPUTE_TYPE = "int8"  # faster-whisper quantization: int8, int8_float16, float16, float32
+DEVICE = "cpu"
+BEAM_SIZE = 5
+CPU_THREADS = os.cpu_count() or 1
+
+
+class TranscriptionEngine:
+    """Speech-to-text with the model loaded once and reused for every file.
+
+    Both backends return the reference whisper result shape:
+    {"text", "language", "segments": [{"start", "end", "text", ("words")}]}.
+    """
+
+    def __init__(self, model_size: str, backend: str = BACKEND, compute_type: str = COMPUTE_TYPE,
+                 device: str = DEVICE, vad_filter: bool = True, word_timestamps: bool = False,
+                 num_workers: int = 1):
+        if backend not in ("faster-whisper", "whisper"):
+            raise ValueError(f"Unknown transcription backend: {backend}")
+        self.model_size = model_size
+        self.backend = backend
+        self.compute_type = compute_type
+        self.device = device
+        self.vad_filter = vad_filter
+        self.word_timestamps = word_timestamps
+        # faster-whisper can serve this many threads' transcribe() calls in parallel
+        self.num_workers = num_workers if backend == "faster-whisper" else 1
+        self._model = None
+        self._lock = threading.Lock()
+        # Reference whisper installs kv-cache hooks on the shared model per decode, so calls must not overlap
+        self._transcribe_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Load the model on first use only"""
+        with self._lock:
+            if self._model is None:
+                if self.backend == "faster-whisper":
+                    from faster_whisper import WhisperModel
+                    self._model = WhisperModel(self.model_size, device=self.device,
+                                               compute_type=self.compute_type,
+                                               cpu_threads=max(1, CPU_THREADS // self.num_workers),
+                                               num_workers=self.num_workers)
+                else:
+                    import whisper
+                    self._model = whisper.load_model(self.model_size, device=self.device)
+            return self._model
+
+    def transcribe(self, audio) -> Dict:
+        """Transcribe a file path or a 16 kHz mono float32 array.
+
+        Thread-safe: faster-whisper serves up to `num_workers` calls at once,
+        the reference backend runs them one at a time.
+        """
+        if self.backend == "whisper":
+            with self._transcribe_lock:
+                return self.model.transcribe(audio, word_timestamps=self.word_timestamps)
+
+        segments, info = self.model.transcribe(audio, beam_size=BEAM_SIZE, vad_filter=self.vad_filter,
+                                               word_timestamps=self.word_timestamps)
+        result_segments = []
+        for segment in segments:
+            item = {"start": segment.start, "end": segment.end, "text": segment.text}
+            if self.word_timestamps:
+                item["words"] = [{"start": w.start, "end": w.end, "word": w.word, "probability": w.probability}
+                                 for w in segment.words]
+            result_segments.append(item)
+
+        return {
+            "text": "".join(s["text"] for s in result_segments).strip(),
+            "language": info.language,
+            "segments": result_segments
+        }
+
+    def transcribe_many(self, audio_paths: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+        """Transcribe files one after another in this session, yielding (path, result)"""
+        for path in audio_paths:
+            yield path, self.transcribe(path)
+
+
+@lru_cache(maxsize=None)
+def get_engine(model_size: str, backend: str = BACKEND, compute_type: str = COMPUTE_TYPE,
+               device: str = DEVICE, vad_filter: bool = True,
+               word_timestamps: bool = False, num_workers: int = 1) -> TranscriptionEngine:
+    """Per-process shared engine for a given configuration"""
+    return TranscriptionEngine(model_size, backend, compute_type, device, vad_filter, word_timestamps,
+                               num_workers)
@@ -1,10 +1,22 @@
-from faster_whisper import WhisperModel
-from app.config import ASR_MODEL, MODELS_DIR
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from app.config import (ASR_MODEL, MODELS_DIR, ASR_ADAPTIVE, ASR_BEAM_SIZE, ASR_LANGUAGE,
+                        ASR_LOGPROB_THRESHOLD, ASR_COMPRESSION_RATIO_THRESHOLD, ASR_NO_SPEECH_THRESHOLD,
+                        ASR_BATCH_SIZE, ASR_BATCH_WAIT_MS)
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import Future
+from typing import List, Tuple
 import numpy as np
+import queue
+import threading
 import webrtcvad
 from pydub import AudioSegment
 import io
 
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 30 * SAMPLE_RATE  # Whisper's input window
+GAP_SAMPLES = SAMPLE_RATE  # Unused silence between batched requests, wider than any timestamp rounding
+
 class ASR:
     def __init__(self):
         self.model = WhisperModel(
@@ -13,7 +25,13 @@ class ASR:
             compute_type="int8",
             download_root=str(MODELS_DIR)
         )
+        self.pipeline = BatchedInferencePipeline(model=self.model)
         self.vad = webrtcvad.Vad(2)  # Aggressiveness mode (0-3)
+        self.stats = Counter()  # accepted / redecoded first passes, batches, batched_requests
+
+        # Requests from concurrent callers are collected here and decoded together
+        self._requests: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        threading.Thread(target=self._batch_loop, name="asr-batcher", daemon=True).start()
 
     def is_speech(self, audio_np: np.ndarray, sample_rate: int = 16000) -> bool:
         """Check if audio contains speech using VAD."""
@@ -33,21 +51,116 @@ class ASR:
                 return True
         return False
 
-    def transcribe(self, audio_bytes: bytes) -> str:
-        """Transcribe audio bytes to text."""
+    def _batch_loop(self):
+        """Wait for a request, gather whatever else arrives within ASR_BATCH_WAIT_MS, decode them together."""
+        while True:
+            batch = [self._requests.get()]
+            try:
+                while len(batch) < ASR_BATCH_SIZE:
+                    batch.append(self._requests.get(timeout=ASR_BATCH_WAIT_MS / 1000))
+            except queue.Empty:
+                pass
+
+            try:
+                results = self._decode_batch([samples for samples, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _decode_batch(self, requests: List[np.ndarray]) -> List[Tuple[str, bool]]:
+        """Greedy-decode several requests in shared encoder passes.
+
+        The requests are laid end to end, one second apart, and each is cut
+        into equal windows of at most 30 s; the batched pipeline encodes and
+        decodes those windows ASR_BATCH_SIZE at a time, and each resulting
+        segment is mapped back to its request by its start time. Returns
+        (text, confident) per request.
+        """
+        boundaries = []
+        clips = []
+        pieces = []
+        position = 0
+        for samples in requests:
+            boundaries.append(position - GAP_SAMPLES // 2)
+            windows = -(-len(samples) // CHUNK_SAMPLES)
+            size = -(-len(samples) // windows)
+            for start in range(0, len(samples), size):
+                clips.append({"start": position + start, "end": position + min(start + size, len(samples))})
+            pieces += [samples, np.zeros(GAP_SAMPLES, dtype=np.float32)]
+            position += len(samples) + GAP_SAMPLES
+
+        segments, _ = self.pipeline.transcribe(
+            np.concatenate(pieces),
+            language=ASR_LANGUAGE,
+            multilingual=ASR_LANGUAGE is None,  # Requests may differ in language: detect per window
+            clip_timestamps=clips,
+            batch_size=ASR_BATCH_SIZE,
+            beam_size=1 if ASR_ADAPTIVE else ASR_BEAM_SIZE,
+            temperature=0.0
+        )
+
+        texts = [[] for _ in requests]
+        confident = [True] * len(requests)
+        for segment in segments:
+            index = bisect_right(boundaries, segment.start * SAMPLE_RATE) - 1
+            if self._is_silence(segment):
+                continue
+            texts[index].append(segment.text)
+            if not self._is_confident(segment):
+                confident[index] = False
+
+        self.stats["batches"] += 1
+        self.stats["batched_requests"] += len(requests)
+        return [(" ".join(parts).strip(), ok) for parts, ok in zip(texts, confident)]
+
+    @staticmethod
+    def _is_silence(segment) -> bool:
+        """Whisper's no-speech rule: likely silence and a low-confidence decode."""
+        return segment.no_speech_prob > ASR_NO_SPEECH_THRESHOLD and segment.avg_logprob < ASR_LOGPROB_THRESHOLD
+
+    @staticmethod
+    def _is_confident(segment) -> bool:
+        """Whisper's temperature-fallback criteria, applied to the greedy pass."""
+        return (segment.avg_logprob >= ASR_LOGPROB_THRESHOLD
+                and segment.compression_ratio <= ASR_COMPRESSION_RATIO_THRESHOLD)
+
+    def decode_audio(self, audio_bytes: bytes) -> np.ndarray:
+        """Decode any pydub-readable audio to mono 16 kHz float32 samples."""
         # Convert bytes to AudioSegment
         audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
         
         # Convert to mono 16kHz for Whisper
-        audio = audio.set_frame_rate(16000).set_channels(1)
+        audio = audio.set_frame_rate(SAMPLE_RATE).set_channels(1)
         
         # Convert to numpy array
-        samples = np.array(audio.get_array_of_samples()).astype(np.float32) / 32768.0
+        return np.array(audio.get_array_of_samples()).astype(np.float32) / 32768.0
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        """Transcribe audio bytes to text.
+
+        Safe to call from several threads at once: the greedy first pass of
+        concurrent calls is batched. Only when that pass is not confident
+        (low average log-probability or a repetitive, highly compressible
+        output) is the audio decoded again with beam search and
+        temperature fallback, as every request used to be.
+        """
+        samples = self.decode_audio(audio_bytes)
         
         # Skip if no speech detected
         if not self.is_speech(samples):
             return ""
-        
-        segments, _ = self.model.transcribe(samples, beam_size=5)
+
+        future = Future()
+        self._requests.put((samples, future))
+        text, confident = future.result()
+        if confident or not ASR_ADAPTIVE:
+            self.stats["accepted"] += 1
+            return text
+
+        self.stats["redecoded"] += 1
+        segments, _ = self.model.transcribe(samples, beam_size=ASR_BEAM_SIZE, language=ASR_LANGUAGE)
         text = " ".join([segment.text for segment in segments])
-        return text.strip()
\ No newline at end of file
+        return text.strip()
@@ -9,5 +9,15 @@ ASR_MODEL = "small"  # faster-whisper model size (tiny, base, small, medium, lar
 LLM_MODEL = "meta-llama/Meta-Llama-3-8B-Instruct"
 TTS_MODEL = "tts_models/en/ljspeech/glow-tts"
 
+# ASR settings
+ASR_LANGUAGE = None  # e.g. "en" to skip language detection; None detects it per 30 s window
+ASR_ADAPTIVE = True  # Greedy first pass; re-decode with beam search only when it looks unreliable
+ASR_BEAM_SIZE = 5
+ASR_LOGPROB_THRESHOLD = -1.0  # Whisper's fallback thresholds, applied to the greedy pass
+ASR_COMPRESSION_RATIO_THRESHOLD = 2.4
+ASR_NO_SPEECH_THRESHOLD = 0.6
+ASR_BATCH_SIZE = 8  # 30 s windows per encoder pass, across concurrent requests
+ASR_BATCH_WAIT_MS = 20  # How long the first request waits for others to join its batch
+
 # Conversation settings
 MAX_CONVERSATION_TURNS = 5
\ No newline at end of file
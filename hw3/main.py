@@ -1,4 +1,5 @@
 from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from app.asr import ASR
 from app.llm import LLM_Agent
@@ -21,7 +22,8 @@ async def converse(audio: UploadFile):
         # 1. Transcribe audio
         start_time = time.time()
         audio_bytes = await audio.read()
-        transcription = asr.transcribe(audio_bytes)
+        # Off the event loop, so concurrent requests can share ASR batches
+        transcription = await run_in_threadpool(asr.transcribe, audio_bytes)
         transcribe_time = time.time() - start_time
         
         if not transcription: